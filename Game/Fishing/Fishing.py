@@ -27,9 +27,8 @@ controller = DynamixelController()
 if not controller.initialize():
     print("Dynamixel controller initialization failed.")
     sys.exit(1)
-# Initial position commands
-controller.move_to_position(1, [0])
-controller.move_to_position(2, [0])
+# Initial position commands (both motors start together)
+controller.sync_move({1: 0, 2: 0})
 
 # Window settings
 WIDTH, HEIGHT = 480, 360
@@ -135,7 +134,7 @@ def run_game():
 
         # 再执行控制器动作提示
         param = motor_params[instruction]
-        controller.move_to_position(param['motor_id'], [param['movement'], 0])
+        controller.move_to_position([param['movement'], 0], dxl_id=param['motor_id'])
 
     # Arrow icons for display
     arrow_map = {'left': '<-', 'right': '->', 'up': '^', 'down': 'v'}
@@ -207,7 +206,7 @@ def run_game():
             pygame.display.flip()
             if not initial_moved:
                 param = ini_motor_params[initial_dir]
-                controller.move_to_position(param['motor_id'], [param['movement'], 0])
+                controller.move_to_position([param['movement'], 0], dxl_id=param['motor_id'])
                 pygame.time.delay(1000)
                 initial_moved = True
             continue
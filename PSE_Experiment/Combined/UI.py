@@ -1,6 +1,12 @@
+import os
+import sys
 import tkinter as tk
 from typing import List
 from params import get_trial_moves
+from timing import TimingEngine
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from dxl_control.worker import MotionWorker
 
 # Dummy controller for testing
 class DummyController:
@@ -8,22 +14,55 @@ class DummyController:
         print("Dummy: 读取当前电机位置")
         return 500
 
-    def move_to_position(self, positions: List[int]):
+    def move_to_position(self, positions: List[int], dxl_id=None, speed=None):
         print("Dummy: 正在移动到位置:", positions)
 
 class ExperimentUI:
+    # Widget toolkit, motion worker and timing engine; headless.py swaps in stand-ins
+    toolkit = tk
+    motion_class = MotionWorker
+    timing_class = TimingEngine
+
+    # Keyboard alternatives to the response buttons
+    RESPONSE_KEYS = {
+        "<KeyPress-1>": "First Greater",
+        "<KeyPress-2>": "Second Greater",
+        "<Left>": "First Greater",
+        "<Right>": "Second Greater"
+    }
+
     def __init__(self, controller_dict=None,
                  trials_dict=None, pre_trials_dict=None,
-                 stages=None):
+                 stages=None, isi=None, journal=None, plan=None, progress=None):
+        """
+        :param isi: Seconds from the end of the first stimulus to the start of the
+                    second. None lets the participant trigger the second one with SPACE.
+        :param journal: TrialJournal every completed trial is appended to
+        :param plan: SessionPlan (plan.py) to play instead of trials_dict,
+                     pre_trials_dict and stages; controller_dict from plan.controller_dict
+        :param progress: Called as progress(record, trials done, trials in block) after every trial
+        """
+        tk = self.toolkit
         self.controller_dict = controller_dict
         self.root = tk.Tk()
         self.root.title("Interactive UI")
         self.root.geometry("1280x720")
 
-        self.stages = stages  # List of stage names in order
+        # Stimuli run on a background thread so the window keeps repainting
+        self.motion = self.motion_class(self.root)
+        self.timing = self.timing_class(self.root, self.motion)
+        self.isi = isi
+        self.stim_times = {}  # {1: (onset, offset), 2: (onset, offset)} of the current trial
+
+        self.plan = plan
+        self.plan_index = None  # index in the plan of the current trial
+        self.current_speeds = (None, None)  # profile velocities of the current trial (speed policy if None)
+        self.stages = list(plan.stages) if plan is not None else stages  # List of stage names in order
         self.current_stage_idx = 0
         self.trial_count = 0
         self.responses = []
+        self.journal = journal
+        self.progress = progress
 
         self.trials_dict = trials_dict
         self.pre_trials_dict = pre_trials_dict
@@ -71,6 +110,8 @@ class ExperimentUI:
         self.option3_button = tk.Button(button_frame_trial, text="Second Greater", font=("Helvetica", 24), width=12,
                                         command=lambda: self.handle_trial_response("Second Greater"), state=tk.DISABLED)
         self.option3_button.pack(side=tk.LEFT, padx=10)
+        for key, response in self.RESPONSE_KEYS.items():
+            self.root.bind(key, lambda event, r=response: self.handle_response_key(event, r))
 
         # ----- Rest page -----
         self.rest_label = tk.Label(self.rest_frame,
@@ -85,16 +126,64 @@ class ExperimentUI:
 
     def _load_stage(self, stage_name):
         self.current_stage = stage_name
+        self.current_controller = self.controller_dict[stage_name]  # SELECT CONTROLLER
+        self.trial_stage = stage_name  # direction of the current trial (differs per trial when interleaved)
+        self.trial_count = 0
+        if self.plan is not None:
+            self.block_start, block_end = self.plan.block_range(stage_name)
+            self.trial_move_values = None
+            self.pre_trial_move_value, self.pre_trial_speeds = self.plan.pre_trial(stage_name)
+            self.MAX_TRIALS = block_end - self.block_start
+            return
         self.trial_move_values = self.trials_dict[stage_name]
         self.pre_trial_move_value = self.pre_trials_dict[stage_name]
-        self.current_controller = self.controller_dict[stage_name]  # SELECT CONTROLLER
+        self.pre_trial_speeds = (None, None)
         self.MAX_TRIALS = len(self.trial_move_values)
-        self.trial_count = 0
-
+        self.trial_iter = iter(self.trial_move_values)  # adaptive sequences build each trial on demand
+        self.fetched_trial = -1  # trial_count of current_trial_pair
+
+
+    def resume(self, records):
+        """
+        Continue a session from journalled trials. They are replayed through the
+        trial sequences (adaptive ones get their responses again), so the
+        session carries on at the stage and trial where it stopped.
+        With a plan, the position is looked up from the number of records.
+        """
+        if self.plan is not None:
+            self.current_stage_idx, trial_count = self.plan.locate(len(records))
+            self._load_stage(self.stages[self.current_stage_idx])
+            self.trial_count = trial_count
+            if records and records[-1].get("index", len(records) - 1) != len(records) - 1:
+                print(f"[Resume] Journal does not follow the plan: last trial has index "
+                      f"{records[-1]['index']}, expected {len(records) - 1}")
+            self.responses.extend(records)
+            print(f"[Resume] {len(records)} trials restored, continuing {self.current_stage} "
+                  f"at trial {self.trial_count + 1}/{self.MAX_TRIALS}")
+            return
+        for res in records:
+            while res.get("block", self.current_stage) != self.current_stage:
+                self.current_stage_idx += 1
+                self._load_stage(self.stages[self.current_stage_idx])
+            trial = next(self.trial_iter)
+            if [trial[0], trial[1]] != [res["pos1"], res["pos2"]]:
+                print(f"[Resume] Trial {res['trial']} ({self.current_stage}) differs from the journal: "
+                      f"{trial[:2]} vs {[res['pos1'], res['pos2']]}")
+            if hasattr(self.trial_move_values, "record"):
+                self.trial_move_values.record(res["response"])
+            self.trial_count += 1
+            self.responses.append(res)
+        print(f"[Resume] {len(records)} trials restored, continuing {self.current_stage} "
+              f"at trial {self.trial_count + 1}/{self.MAX_TRIALS}")
 
     def start_experiment(self):
         self.main_frame.pack_forget()
-        self.show_pre_trial_page()
+        if self.trial_count >= self.MAX_TRIALS:
+            self.show_rest_page_or_finish()  # resumed right after a stage ended
+        elif self.trial_count > 0:
+            self.show_trial_page()           # resumed mid-stage, no second practice
+        else:
+            self.show_pre_trial_page()
 
     def show_pre_trial_page(self):
         self.pre_trial_frame.pack(expand=True, fill='both')
@@ -107,23 +196,29 @@ class ExperimentUI:
         self.root.bind("<space>", self.handle_pre_trial_space)
 
     def handle_pre_trial_space(self, event):
-        if self.phase_stage == 0:
+        if self.motion.busy:
+            return  # ignore SPACE while a stimulus is playing
+        if self.phase_stage == 0 and self.isi is not None:
+            self.pre_trial_label.config(text="\n\n Stimulation in progress...")
+            self._play_pair(self.pre_trial_move_value, self.pre_trial_label, "\n\n Now please make your choice.",
+                            (self.l_button, self.s_button), self.pre_trial_speeds)
+        elif self.phase_stage == 0:
             self.pre_trial_label.config(
                 text="\n\n First stimulation triggered. Press SPACE for the second stimulation.")
-            self.current_controller.move_to_position(self.pre_trial_move_value[0])
-            self.phase_stage = 1
+            self._play_stimulus(self.pre_trial_move_value[0], next_phase=1, speed=self.pre_trial_speeds[0])
         elif self.phase_stage == 1:
             self.pre_trial_label.config(
                 text="\n\n Second stimulation triggered. Now please make your choice.")
-            self.current_controller.move_to_position(self.pre_trial_move_value[1])
-            self.phase_stage = 2
-            self.l_button.config(state=tk.NORMAL)
-            self.s_button.config(state=tk.NORMAL)
+            self._play_stimulus(self.pre_trial_move_value[1], next_phase=2,
+                                buttons=(self.l_button, self.s_button), speed=self.pre_trial_speeds[1])
 
     def show_result(self):
+        # A second click during the wait would schedule the trial page twice and skip a trial
+        self.l_button.config(state=tk.DISABLED)
+        self.s_button.config(state=tk.DISABLED)
         self.result_label.config(
             text="Pre-experiment finished. Let's proceed to the formal experiment.")
-        self.root.after(4000, self.goto_trial_page)
+        self.timing.call_at(self.timing.now() + 4.0, self.goto_trial_page)
 
     def goto_trial_page(self):
         self.pre_trial_frame.pack_forget()
@@ -131,8 +226,17 @@ class ExperimentUI:
 
     def show_trial_page(self):
         self.trial_frame.pack(expand=True, fill='both')
-        if self.trial_count < self.MAX_TRIALS:
-            self.current_trial_pair = self.trial_move_values[self.trial_count]
+        if self.trial_count < self.MAX_TRIALS and self.plan is not None:
+            self.plan_index = self.block_start + self.trial_count
+            self.current_trial_pair = self.plan.trial(self.plan_index)
+            self.current_speeds = self.plan.speeds(self.plan_index)
+            self._switch_track(self.plan.direction_of(self.plan_index))
+        elif self.trial_count < self.MAX_TRIALS and self.fetched_trial != self.trial_count:
+            self.current_trial_pair = next(self.trial_iter)
+            self.fetched_trial = self.trial_count  # showing the page again keeps the same trial
+            track = getattr(self.trial_move_values, "current_track", None)
+            if track is not None:
+                self._switch_track(track)
         self.phase_stage = 0
         self.option1_button.config(state=tk.DISABLED)
         self.option3_button.config(state=tk.DISABLED)
@@ -140,28 +244,114 @@ class ExperimentUI:
         self.trial_label.config(
             text=f"{self.current_stage.capitalize()} Trial {self.trial_count + 1}/{self.MAX_TRIALS}:\n\nPress SPACE for the first stimulation.")
 
+    def _switch_track(self, track):
+        """
+        Interleaved block: select the controller of the next trial's direction.
+        Every stimulus returns to 0, so the motor that goes idle is already centred.
+        """
+        self.trial_stage = track
+        self.current_controller = self.controller_dict[track]
+
     def handle_trial_space(self, event):
-        if self.phase_stage == 0:
+        if self.motion.busy:
+            return  # ignore SPACE while a stimulus is playing
+        title = f"{self.current_stage.capitalize()} Trial {self.trial_count + 1}/{self.MAX_TRIALS}:"
+        if self.phase_stage == 0 and self.isi is not None:
+            self.trial_label.config(text=f"{title}\n\nStimulation in progress...")
+            self._play_pair(self.current_trial_pair, self.trial_label, f"{title}\n\nNow please make your choice.",
+                            (self.option1_button, self.option3_button), self.current_speeds)
+        elif self.phase_stage == 0:
             self.trial_label.config(
-                text=f"{self.current_stage.capitalize()} Trial {self.trial_count + 1}/{self.MAX_TRIALS}:\n\nFirst stimulation triggered. Press SPACE for the second stimulation.")
-            self.current_controller.move_to_position(self.current_trial_pair[0])
-            self.phase_stage = 1
+                text=f"{title}\n\nFirst stimulation triggered. Press SPACE for the second stimulation.")
+            self._play_stimulus(self.current_trial_pair[0], next_phase=1, speed=self.current_speeds[0])
         elif self.phase_stage == 1:
             self.trial_label.config(
-                text=f"{self.current_stage.capitalize()} Trial {self.trial_count + 1}/{self.MAX_TRIALS}:\n\nSecond stimulation triggered. Now please make your choice.")
-            self.current_controller.move_to_position(self.current_trial_pair[1])
-            self.phase_stage = 2
-            self.option1_button.config(state=tk.NORMAL)
-            self.option3_button.config(state=tk.NORMAL)
-
-    def handle_trial_response(self, response):
-        self.responses.append({
+                text=f"{title}\n\nSecond stimulation triggered. Now please make your choice.")
+            self._play_stimulus(self.current_trial_pair[1], next_phase=2,
+                                buttons=(self.option1_button, self.option3_button), speed=self.current_speeds[1])
+
+    def _play_stimulus(self, target, next_phase, buttons=(), interval=None, prompt=None, speed=None):
+        """
+        Play one stimulus on the motion worker, now or interval seconds after the
+        previous one ended. SPACE is ignored until the motor arrives; then the
+        measured onset/offset is stored, the phase advances and the buttons are enabled.
+        prompt is an optional (label, text) shown at the same moment; speed is
+        the profile velocity (the controller's speed policy if None).
+        """
+        if next_phase == 1:
+            self.stim_times = {}
+
+        def on_done(times):
+            self.stim_times[next_phase] = times or (float("nan"), float("nan"))
+            self.phase_stage = next_phase
+            for button in buttons:
+                button.config(state=tk.NORMAL)
+            if prompt is not None:
+                prompt[0].config(text=prompt[1])
+
+        if interval is None:
+            self.timing.play_at(self.timing.now(), self.current_controller, target, on_done, speed)
+        else:
+            self.timing.play_after_previous(interval, self.current_controller, target, on_done, speed)
+
+    def _play_pair(self, pair, label, prompt, buttons, speeds=(None, None)):
+        """
+        Play both stimuli of a trial with a fixed ISI; the response window
+        opens when the second one ends.
+        """
+        self._play_stimulus(pair[0], next_phase=1, speed=speeds[0])
+        self._play_stimulus(pair[1], next_phase=2, buttons=buttons, interval=self.isi, prompt=(label, prompt),
+                            speed=speeds[1])
+
+    def handle_response_key(self, event, response):
+        """
+        Keyboard response; only counts while the response buttons are enabled.
+        """
+        if str(self.option1_button["state"]) != tk.NORMAL:
+            return
+        timestamp, latency = self.timing.event_time(event)
+        self.handle_trial_response(response, timestamp=timestamp, source="key", input_latency=latency)
+
+    def handle_trial_response(self, response, timestamp=None, source="mouse", input_latency=None):
+        """
+        :param timestamp: perf_counter time of the response (now if None, e.g. button clicks)
+        :param source: "mouse" or "key"
+        :param input_latency: Seconds between the key press and this handler (keyboard only)
+        """
+        if timestamp is None:
+            timestamp = self.timing.now()
+        self.option1_button.config(state=tk.DISABLED)  # one response per trial
+        self.option3_button.config(state=tk.DISABLED)
+        pos1, pos2, std_idx = self.current_trial_pair
+        res = {
             "trial": self.trial_count + 1,
-            "value": self.current_trial_pair,
+            "pos1": pos1,
+            "pos2": pos2,
+            "std_idx": std_idx,
             "response": response,
-            "stage": self.current_stage
-        })
+            "stage": self.trial_stage,
+            "block": self.current_stage,
+            "t_start": self.stim_times[1][0],
+            "t_end": timestamp,
+            "stim1_onset": self.stim_times[1][0],
+            "stim1_offset": self.stim_times[1][1],
+            "stim2_onset": self.stim_times[2][0],
+            "stim2_offset": self.stim_times[2][1],
+            "response_time": timestamp,
+            "rt": timestamp - self.stim_times[2][1],  # from the end of the second stimulus
+            "response_source": source,
+            "input_latency": input_latency
+        }
+        if self.plan is not None:
+            res["index"] = self.plan_index  # the result writer takes the mm labels from the plan
+        self.responses.append(res)
+        if self.journal is not None:
+            self.journal.append(res)
+        if hasattr(self.trial_move_values, "record"):
+            self.trial_move_values.record(response)  # adaptive sequence picks the next level
         self.trial_count += 1
+        if self.progress is not None:
+            self.progress(res, self.trial_count, self.MAX_TRIALS)
         self.trial_frame.pack_forget()
         self.root.unbind("<space>")
         if self.trial_count < self.MAX_TRIALS:
@@ -195,9 +385,10 @@ class ExperimentUI:
     def run(self):
         if self.current_controller:
             current_pos = self.current_controller.read_current_position()
-            self.current_controller.move_to_position([current_pos, 0])
+            self.motion.submit(self.current_controller.move_to_position, [current_pos, 0])
 
         self.root.mainloop()
+        self.motion.stop()
 
 # ---------------------- Example Usage -------------------------
 
@@ -0,0 +1,338 @@
+import os
+import sys
+import math
+import heapq
+import random
+import datetime
+import time
+
+# No motors: main's imports only ever see the simulated Dynamixel backend here
+os.environ.setdefault("DXL_BACKEND", "sim")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from dxl_control.profile import profile_duration
+from UI import ExperimentUI
+from timing import TimingEngine
+from main import build_session, generate_result_file
+from plan import compile_session, session_spec
+from params import STEP_SIZE, THRESHOLD_MM, THRESHOLD_POSITION, ISI
+
+
+class SimulatedObserver:
+    """
+    Scripted participant with a logistic psychometric function.
+
+    The comparison is perceived shifted so that it matches the standard at
+    pse; bias (mm) is added to whichever stimulus came second (time-order
+    error), and with probability lapse the answer is a coin flip.
+    P(second greater) = lapse / 2 + (1 - lapse) * logistic(slope * (perceived2 - perceived1 + bias))
+    """
+
+    def __init__(self, pse=THRESHOLD_MM, slope=4.0, bias=0.0, lapse=0.02,
+                 rt_median=0.6, rt_spread=0.3, seed=None):
+        """
+        :param pse: Comparison (mm) perceived equal to the standard
+        :param slope: Logistic slope per mm, as fitted by the plot scripts
+        :param bias: mm added to the second stimulus
+        :param lapse: Probability of a random answer
+        :param rt_median: Median response time in seconds (log-normal)
+        :param rt_spread: Sigma of log RT
+        """
+        self.pse = pse
+        self.slope = slope
+        self.bias = bias
+        self.lapse = lapse
+        self.rt_median = rt_median
+        self.rt_spread = rt_spread
+        self.rng = random.Random(seed)
+
+    def respond(self, trial):
+        """
+        :param trial: [pos1, pos2, std_idx] as played by the UI
+        :return: (response, rt_seconds)
+        """
+        pos1, pos2, std_idx = trial
+        mm = [THRESHOLD_MM + (abs(pos[0]) - THRESHOLD_POSITION) / STEP_SIZE for pos in (pos1, pos2)]
+        shift = self.pse - THRESHOLD_MM
+        comparison = 1 if std_idx == 1 else 0  # index of the comparison in mm
+        mm[comparison] -= shift
+        d = mm[1] - mm[0] + self.bias
+        p_second = self.lapse / 2 + (1 - self.lapse) / (1 + math.exp(-self.slope * d))
+        response = "Second Greater" if self.rng.random() < p_second else "First Greater"
+        rt = self.rt_median * math.exp(self.rng.gauss(0.0, self.rt_spread))
+        return response, rt
+
+
+# ---------------- Stand-ins for Tk, the motion worker and the motors ----------------
+
+class VirtualClock:
+    """
+    Simulated time in seconds; shared by everything in one headless session.
+    """
+
+    def __init__(self):
+        self.t = 0.0
+
+
+class _Widget:
+    """
+    Records what a Tk widget would show; enough for the ExperimentUI flow.
+    """
+
+    def __init__(self, master=None, **options):
+        self.options = options
+        self.mapped = False
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def __getitem__(self, key):
+        return self.options.get(key, "")
+
+    def pack(self, **options):
+        self.mapped = True
+        return None
+
+    def pack_forget(self):
+        self.mapped = False
+
+
+class HeadlessRoot(_Widget):
+    """
+    Tk root stand-in: after() callbacks go into an event queue on the virtual
+    clock, and mainloop() runs them, asking idle() what happens next whenever
+    nothing is scheduled.
+    """
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.idle = None
+        self._events = []
+        self._count = 0
+        self._quit = False
+
+    def title(self, text):
+        pass
+
+    def geometry(self, spec):
+        pass
+
+    def bind(self, sequence, func):
+        pass
+
+    def unbind(self, sequence):
+        pass
+
+    def after(self, ms, func):
+        return self.after_at(self.clock.t + ms / 1000.0, func)
+
+    def after_at(self, t, func):
+        self._count += 1
+        heapq.heappush(self._events, (t, self._count, func))
+        return self._count
+
+    def quit(self):
+        self._quit = True
+
+    def mainloop(self):
+        while not self._quit:
+            if self._events:
+                t, _, func = heapq.heappop(self._events)
+                self.clock.t = max(self.clock.t, t)
+                func()
+            elif self.idle is None or not self.idle():
+                return
+
+
+class HeadlessToolkit:
+    """
+    The parts of tkinter that ExperimentUI uses.
+    """
+
+    NORMAL = "normal"
+    DISABLED = "disabled"
+    LEFT = "left"
+    Frame = Label = Button = _Widget
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def Tk(self):
+        return HeadlessRoot(self.clock)
+
+
+class HeadlessMotion:
+    """
+    MotionWorker stand-in: runs a command at once (it advances the virtual
+    clock itself) and delivers the completion through the root's event queue.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._pending = 0
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def submit(self, fn, *args, callback=None):
+        self._pending += 1
+        try:
+            result = fn(*args)
+        except Exception as e:
+            print(f"[Motion] Command failed: {e}")
+            result = None
+
+        def done():
+            self._pending -= 1
+            if callback is not None:
+                callback(result)
+
+        self.root.after_at(self.root.clock.t, done)
+
+    def stop(self):
+        pass
+
+
+class VirtualTiming(TimingEngine):
+    """
+    TimingEngine on the virtual clock: waiting for a deadline just moves the clock.
+    """
+
+    def now(self):
+        return self.root.clock.t
+
+    def _sleep_until(self, deadline):
+        self.root.clock.t = max(self.root.clock.t, deadline)
+
+
+class SimulatedController:
+    """
+    Motor stand-in: a move takes as long as the velocity profile says, on the virtual clock.
+    """
+
+    def __init__(self, clock, speed=(100, 500), seed=None):
+        self.clock = clock
+        self.speed = speed
+        self.position = 0
+        self.rng = random.Random(seed)
+
+    def read_current_position(self):
+        return self.position
+
+    def move_to_position(self, target_pos, dxl_id=None, speed=None):
+        velocity = speed
+        if velocity is None:
+            velocity = self.rng.randint(*self.speed) if isinstance(self.speed, (tuple, list)) else self.speed
+        elapsed = 0.0
+        for pos in (target_pos if isinstance(target_pos, (list, tuple)) else [target_pos]):
+            elapsed += profile_duration(pos - self.position, velocity)
+            self.position = pos
+        self.clock.t += elapsed
+        return elapsed
+
+
+class HeadlessExperimentUI(ExperimentUI):
+    """
+    The ExperimentUI flow (practice, trials, rest, stages) answered by a
+    SimulatedObserver, with no window, no sleeping and no motors.
+    """
+
+    motion_class = HeadlessMotion
+    timing_class = VirtualTiming
+
+    def __init__(self, observer, clock, **ui_args):
+        self.observer = observer
+        self.toolkit = HeadlessToolkit(clock)
+        super().__init__(**ui_args)
+        self.root.idle = self._act
+
+    def _act(self):
+        """
+        What the participant does next. False once the session is over.
+        """
+        if self.main_frame.mapped:
+            self.start_experiment()
+        elif self.pre_trial_frame.mapped:
+            if self.result_label["text"]:
+                return False  # nothing scheduled after the practice: flow is stuck
+            if self.l_button["state"] == self.toolkit.NORMAL:
+                self.l_button["command"]()
+            else:
+                self.handle_pre_trial_space(None)
+        elif self.trial_frame.mapped:
+            if self.option1_button["state"] == self.toolkit.NORMAL:
+                response, rt = self.observer.respond(self.current_trial_pair)
+                timestamp = self.stim_times[2][1] + rt
+                self.root.clock.t = max(self.root.clock.t, timestamp)
+                self.handle_trial_response(response, timestamp=timestamp, source="sim")
+            else:
+                self.handle_trial_space(None)
+        elif self.rest_frame.mapped:
+            self.handle_rest_space(None)
+        else:
+            return False
+        return True
+
+
+def run_session(observer, filename=None, isi=ISI, progress=None, **session_args):
+    """
+    Run one complete simulated session.
+    :param observer: SimulatedObserver answering the trials
+    :param filename: Result file written with generate_result_file (none if None)
+    :param progress: Per-trial callback, see ExperimentUI
+    :param session_args: pair_count, adaptive_trials, adaptive_method, interleaved, seed (see build_session)
+    :return: (responses, session duration in simulated seconds)
+
+    Constant-stimuli sessions run from a compiled plan, as in main.
+    """
+    clock = VirtualClock()
+    seed = session_args.get("seed")
+    controller_D = SimulatedController(clock, seed=seed)
+    controller_H = SimulatedController(clock, seed=None if seed is None else seed + 1)
+
+    plan = None
+    if session_args.get("adaptive_trials"):
+        trials_dict, pre_trials_dict, stages, controller_dict = build_session(controller_D, controller_H,
+                                                                              **session_args)
+        ui = HeadlessExperimentUI(observer, clock, controller_dict=controller_dict, trials_dict=trials_dict,
+                                  pre_trials_dict=pre_trials_dict, stages=stages, isi=isi, progress=progress)
+    else:
+        plan = compile_session(session_spec(session_args.get("pair_count", 4),
+                                            session_args.get("interleaved", False), seed))
+        ui = HeadlessExperimentUI(observer, clock, plan=plan, isi=isi, progress=progress,
+                                  controller_dict=plan.controller_dict({"depth": controller_D,
+                                                                        "horizontal": controller_H}))
+    ui.run()
+
+    if filename:
+        generate_result_file(ui.responses, filename=filename,
+                             duration_str=str(datetime.timedelta(seconds=round(clock.t))), plan=plan)
+    return ui.responses, clock.t
+
+
+# ---------------------- Example Usage -------------------------
+
+if __name__ == '__main__':
+    from psychophysics.analysis import count_mixed_logic_abs
+    from psychophysics.fitting import fit_conditions
+    from psychophysics.results import load_report
+
+    n_sessions = 200
+    start = time.perf_counter()
+    for i in range(n_sessions):
+        run_session(SimulatedObserver(pse=5.7, seed=i), seed=i)
+    elapsed = time.perf_counter() - start
+    print(f"{n_sessions} sessions in {elapsed:.2f} s ({n_sessions / elapsed * 60:.0f} per minute)")
+
+    # End to end: result file -> load_report (one stage per direction) -> maximum-likelihood logistic fit
+    filename = "Results/simulated_session.txt"
+    responses, duration = run_session(SimulatedObserver(pse=5.7, slope=4.0, seed=1), filename=filename,
+                                      pair_count=20, seed=1)
+    print(f"{len(responses)} trials, {duration / 60:.1f} simulated minutes")
+    df = load_report(filename)
+    for stage, fit in fit_conditions(count_mixed_logic_abs(df, std_value=5.5, by="stage")).items():
+        print(f"{stage}: fitted x0 = {fit['x0']:.3f} ± {fit['x0_se']:.3f} mm (observer PSE 5.7), k = {fit['k']:.2f}")
@@ -0,0 +1,65 @@
+import json
+import os
+
+
+class TrialJournal:
+    """
+    Append-only session journal: one JSON object per line.
+
+    The first line is a header with the session settings; every completed
+    trial is appended, flushed and fsync'd before the next one starts, so a
+    crash loses at most the trial in progress. load() gives back the header
+    and the completed trials for a resume.
+    """
+
+    def __init__(self, filename, header=None):
+        """
+        :param filename: Journal path; appended to if it already exists
+        :param header: Session settings written as the first line of a new journal
+        """
+        self.filename = filename
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        torn = False
+        if not new:
+            with open(filename, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(filename, "a", encoding="utf-8")
+        if new:
+            self._write(dict(header or {}, type="session"))
+        elif torn:
+            self._file.write("\n")  # end the line a crash left behind, so it stays one bad line
+
+    def append(self, record):
+        self._write(dict(record, type="trial"))
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    @staticmethod
+    def load(filename):
+        """
+        Read a journal back. A torn last line (crash while writing) is ignored.
+        :return: (header, [trial records])
+        """
+        header, records = {}, []
+        with open(filename, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    print(f"[Journal] Ignoring incomplete line in {filename}")
+                    continue
+                kind = entry.pop("type", "trial")
+                if kind == "session":
+                    header = entry
+                else:
+                    records.append(entry)
+        return header, records
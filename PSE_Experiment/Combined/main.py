@@ -1,13 +1,25 @@
 import os
+import sys
+import random
 import datetime
 
-from controller import DynamixelController
+from controller import DynamixelBus, DynamixelController, MOTOR_H, MOTOR_D, sync_move_to_position
+from dxl_control.telemetry import TelemetrySampler
+from psychophysics.interleave import InterleavedTrials
+from psychophysics.results import write_trials
 from UI import ExperimentUI
-from params import get_trial_moves, STEP_SIZE, THRESHOLD_MM, THRESHOLD_POSITION
+from journal import TrialJournal
+from plan import compile_session, session_spec
+from params import (get_trial_moves, get_adaptive_trial_moves, move_to_mm, STEP_SIZE_MM, THRESHOLD_MM, ISI,
+                    PRE_TRIAL_MOVES, DIRECTION_MOTORS)
 
-def generate_result_file(responses, filename="Results/depth_result.txt", duration_str=""):
+def generate_result_file(responses, filename="Results/depth_result.txt", duration_str="", bus_summary=None,
+                         plan=None):
     """
     Generate a result file grouped into forward, backward, left, and right trials with mm values.
+    bus_summary (lines from DynamixelBus.packet_summary) is appended as its own section.
+    With the session's plan, trials that carry a plan index take their mm labels from it.
+    Every trial field is also written to a columnar <name>_trials file (psychophysics.results).
     """
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
@@ -18,6 +30,7 @@ def generate_result_file(responses, filename="Results/depth_result.txt", duratio
         "left": [],
         "right": []
     }
+    rows = []
 
     for res in responses:
         trial = res["trial"]
@@ -26,16 +39,19 @@ def generate_result_file(responses, filename="Results/depth_result.txt", duratio
         response = res["response"]
         stage = res.get("stage", "forward")  # Default to forward if missing
 
-        def vec_to_mm(move_vec):
-            raw = move_vec[0]
-            displacement_mm = (raw - THRESHOLD_POSITION) / STEP_SIZE
-            return round(THRESHOLD_MM + displacement_mm, 1)
-
-        mm1 = vec_to_mm(pos1)
-        mm2 = vec_to_mm(pos2)
+        index = res.get("index")
+        if plan is not None and index is not None:
+            mm1, mm2 = plan.mm1[index], plan.mm2[index]
+        else:
+            mm1, mm2 = move_to_mm(pos1), move_to_mm(pos2)  # adaptive sessions
+        rows.append(dict(res, mm1=mm1, mm2=mm2))
 
         line = f"Trial {trial}: {mm1}mm vs {mm2}mm  {std_idx}  {response}"
 
+        rt = res.get("rt")
+        if rt is not None and rt == rt:  # skip missing / NaN
+            line += f"  RT {rt:.3f}s"
+
         if stage in sections:
             sections[stage].append(line)
         else:
@@ -52,14 +68,77 @@ def generate_result_file(responses, filename="Results/depth_result.txt", duratio
                     f.write(line + "\n")
                 f.write("\n")
 
+        if bus_summary:
+            f.write("=== Bus Statistics ===\n")
+            for line in bus_summary:
+                f.write(line + "\n")
+
     print(f"Results saved to {filename}")
+    write_trials(rows, os.path.splitext(filename)[0] + "_trials")
+
+def build_session(controller_D, controller_H, pair_count=4, adaptive_trials=0,
+                  adaptive_method="staircase", interleaved=False, seed=None):
+    """
+    Trials, practice trials, stage order and controller per stage of one session.
+    Everything random is derived from seed, so the same arguments give the same session.
+    main only uses this for adaptive sessions; constant stimuli are compiled with plan.compile_session.
+    :return: (trials_dict, pre_trials_dict, stages, controller_dict) for ExperimentUI
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    rng = random.Random(seed)  # local, so other users of the random module are not reseeded
+
+    # Trials
+    if adaptive_trials:
+        forward_trials = get_adaptive_trial_moves(adaptive_trials, "forward", adaptive_method, seed=seed + 1)
+        backward_trials = get_adaptive_trial_moves(adaptive_trials, "backward", adaptive_method, seed=seed + 2)
+        left_trials = get_adaptive_trial_moves(adaptive_trials, "left", adaptive_method, seed=seed + 3)
+        right_trials = get_adaptive_trial_moves(adaptive_trials, "right", adaptive_method, seed=seed + 4)
+    else:
+        forward_trials = get_trial_moves(pair_count, "forward", rng=rng)
+        backward_trials = get_trial_moves(pair_count, "backward", rng=rng)
+        left_trials = get_trial_moves(pair_count, "left", rng=rng)
+        right_trials = get_trial_moves(pair_count, "right", rng=rng)
+
+    trials_dict = {
+        "forward": forward_trials,
+        "backward": backward_trials,
+        "left": left_trials,
+        "right": right_trials
+    }
+
+    pre_trials_dict = dict(PRE_TRIAL_MOVES)
+
+    stages = ["forward", "backward", "left", "right"]
+
+    controllers = {"depth": controller_D, "horizontal": controller_H}
+    controller_dict = {stage: controllers[motor] for stage, motor in DIRECTION_MOTORS.items()}
 
-def main():
+    if interleaved:
+        # One block, one practice (forward); the trials keep their own direction as stage
+        trials_dict = {"interleaved": InterleavedTrials(trials_dict, seed=seed)}
+        pre_trials_dict = {"interleaved": PRE_TRIAL_MOVES["forward"]}
+        controller_dict["interleaved"] = controller_D
+        stages = ["interleaved"]
+
+    return trials_dict, pre_trials_dict, stages, controller_dict
+
+def main(resume=None, port=None, participant="Kevin", motors=(MOTOR_H, MOTOR_D), progress=None):
+    """
+    :param resume: Journal of an interrupted session to continue (Results/..._journal.jsonl)
+    :param port: Serial port of the rig (DynamixelBus.DEVICENAME if None)
+    :param participant: Prefix of the result, telemetry and journal files
+    :param motors: (horizontal, depth) MotorConfig calibration of the rig
+    :param progress: Called with each trial record, see ExperimentUI
+    :return: Result file name, None if the session did not finish
+    """
     # ------------------ 记录开始时间 ------------------
     start_time = datetime.datetime.now()
 
-    controller_H = DynamixelController(dxl_id=1, mid_offset=930)  # Horizontal motor
-    controller_D = DynamixelController(dxl_id=2, mid_offset=995)  # Directional motor
+    # Both motors share one port
+    bus = DynamixelBus(port)
+    controller_H = DynamixelController(motors[0], bus=bus)  # Horizontal motor
+    controller_D = DynamixelController(motors[1], bus=bus)  # Directional motor
 
     D_success = controller_D.initialize()
     H_success = controller_H.initialize()
@@ -68,66 +147,108 @@ def main():
         print("One or both motors failed to initialize.")
         return
 
+    # Center both axes together before the first stage
+    sync_move_to_position([controller_H, controller_D], [0, 0])
+
+    # Play each [pos, 0] stimulus as one timed plan
+    controller_H.use_scheduler()
+    controller_D.use_scheduler()
+
+    # Record what each stimulus physically delivered
+    sampler = TelemetrySampler(bus, [controller_H.DXL_ID, controller_D.DXL_ID])
+    sampler.start()
+
     ui = None  # 提前定义，避免except里找不到ui
+    journal = None
     try:
         pair_count = 4  # Should be even
+        adaptive_trials = 0  # > 0: that many adaptive trials per direction instead of constant stimuli
+        adaptive_method = "staircase"  # or "psi"
+        interleaved = False  # True: all four directions in one block, direction picked per trial
+        seed = random.randrange(2 ** 32)  # all trial randomisation, so a resume rebuilds the same trials
+
+        # ------------------ 恢复中断的实验 ------------------
+        done = []
+        spec = None
+        if resume:
+            header, done = TrialJournal.load(resume)
+            pair_count = header["pair_count"]
+            adaptive_trials = header["adaptive_trials"]
+            adaptive_method = header["adaptive_method"]
+            interleaved = header["interleaved"]
+            seed = header["seed"]
+            spec = header.get("plan")
+            print(f"Resuming {resume}: {len(done)} trials already done")
+
+        # Constant stimuli are compiled up front: trial order, velocities and mm labels
+        plan = None
+        if not adaptive_trials:
+            plan = compile_session(spec or session_spec(pair_count, interleaved, seed))
 
-        # Trials
-        forward_trials = get_trial_moves(pair_count, "forward")
-        backward_trials = get_trial_moves(pair_count, "backward")
-        left_trials = get_trial_moves(pair_count, "left")
-        right_trials = get_trial_moves(pair_count, "right")
-
-        # Pre-trials
-        forward_pre_trial = [[500, 0], [200, 0]]
-        backward_pre_trial = [[-500, 0], [-200, 0]]
-        left_pre_trial = [[300, 0], [100, 0]]
-        right_pre_trial = [[-300, 0], [-100, 0]]
-
-        trials_dict = {
-            "forward": forward_trials,
-            "backward": backward_trials,
-            "left": left_trials,
-            "right": right_trials
-        }
-
-        pre_trials_dict = {
-            "forward": forward_pre_trial,
-            "backward": backward_pre_trial,
-            "left": left_pre_trial,
-            "right": right_pre_trial
-        }
-
-        stages = ["forward", "backward", "left", "right"]
-
-        controller_dict = {
-            "forward": controller_D,
-            "backward": controller_D,
-            "left": controller_H,
-            "right": controller_H
-        }
+        journal_name = resume or f"Results/{participant}_{start_time.strftime('%Y%m%d_%H%M%S')}_journal.jsonl"
+        journal = TrialJournal(journal_name, header={
+            "start": start_time.isoformat(),
+            "pair_count": pair_count,
+            "adaptive_trials": adaptive_trials,
+            "adaptive_method": adaptive_method,
+            "interleaved": interleaved,
+            "seed": seed,
+            "plan": plan.spec if plan else None
+        })
 
         # Create UI
-        ui = ExperimentUI(
-            controller_dict=controller_dict,
-            trials_dict=trials_dict,
-            pre_trials_dict=pre_trials_dict,
-            stages=stages
-        )
+        if plan:
+            stages = plan.stages
+            ui = ExperimentUI(
+                controller_dict=plan.controller_dict({"depth": controller_D, "horizontal": controller_H}),
+                plan=plan,
+                isi=ISI,
+                journal=journal,
+                progress=progress
+            )
+        else:
+            trials_dict, pre_trials_dict, stages, controller_dict = build_session(
+                controller_D, controller_H, pair_count, adaptive_trials, adaptive_method, interleaved, seed)
+            ui = ExperimentUI(
+                controller_dict=controller_dict,
+                trials_dict=trials_dict,
+                pre_trials_dict=pre_trials_dict,
+                stages=stages,
+                isi=ISI,
+                journal=journal,
+                progress=progress
+            )
+        if done:
+            ui.resume(done)
 
         ui.run()
 
+        if adaptive_trials:
+            sequences = trials_dict["interleaved"].tracks if interleaved else trials_dict
+            for stage, sequence in sequences.items():
+                level = sequence.estimate()
+                if level is not None:
+                    print(f"[Adaptive] {stage} PSE estimate: {THRESHOLD_MM + level * STEP_SIZE_MM:.2f}mm")
+
         # ------------------ 记录结束时间 ------------------
         end_time = datetime.datetime.now()
         duration = end_time - start_time
-        duration_str = str(duration)
+        duration_str = str(duration) + (f" (resumed from {resume})" if resume else "")
 
         # Auto timestamp filename + duration in filename (minutes)
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         duration_minutes = round(duration.total_seconds() / 60, 1)
-        filename = f"Results/Kevin_{timestamp}_{duration_minutes}min.txt"
+        filename = f"Results/{participant}_{timestamp}_{duration_minutes}min.txt"
+
+        sampler.stop()
+        # perf_counter stamps of resumed trials belong to the crashed process, so only this run's are cut
+        sampler.save_trials(filename.replace(".txt", "_telemetry.npz"),
+                            [(res["t_start"], res["t_end"]) for res in ui.responses[len(done):]],
+                            first_index=len(done))
 
-        generate_result_file(ui.responses, filename=filename, duration_str=duration_str)
+        generate_result_file(ui.responses, filename=filename, duration_str=duration_str,
+                             bus_summary=bus.packet_summary(), plan=plan)
+        return filename
 
     except Exception as e:
         try:
@@ -135,10 +256,19 @@ def main():
         except:
             current_stage = "unknown"
         print(f"[ERROR] Experiment failed at stage '{current_stage}' with error: {e}")
+        if journal:
+            print(f"Completed trials are in {journal.filename}; run main.py {journal.filename} to resume.")
 
     finally:
+        sampler.stop()
+        if journal:
+            journal.close()
+        print(controller_H.scheduler.jitter_summary())
+        print(controller_D.scheduler.jitter_summary())
+        if ui:
+            print(ui.timing.summary())
         controller_D.close()
         controller_H.close()
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,6 +1,11 @@
+import os
 import random
+import sys
 from typing import List, Literal
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from psychophysics.staircase import StaircaseTrials
+
 # ==============================
 # Constants
 # ==============================
@@ -13,6 +18,24 @@ DEFAULT_POSITION = 0
 THRESHOLD_MM = 5.5
 THRESHOLD_POSITION = THRESHOLD_MM * STEP_SIZE
 
+ISI = 0.5  # Seconds from the end of stimulus 1 to the start of stimulus 2 (None = participant presses SPACE)
+
+# Practice pair per direction
+PRE_TRIAL_MOVES = {
+    "forward": [[500, 0], [200, 0]],
+    "backward": [[-500, 0], [-200, 0]],
+    "left": [[300, 0], [100, 0]],
+    "right": [[-300, 0], [-100, 0]]
+}
+
+# Motor that plays each direction
+DIRECTION_MOTORS = {
+    "forward": "depth",
+    "backward": "depth",
+    "left": "horizontal",
+    "right": "horizontal"
+}
+
 # ==============================
 # Helper Functions
 # ==============================
@@ -31,6 +54,13 @@ def opposite_move(move: List[int]) -> List[int]:
     """
     return [-move[0], move[1]]
 
+def move_to_mm(move: List[int]) -> float:
+    """
+    Label in mm of a move, as written to the result files.
+    """
+    displacement_mm = (move[0] - THRESHOLD_POSITION) / STEP_SIZE
+    return round(THRESHOLD_MM + displacement_mm, 1)
+
 # ==============================
 # Precomputed Moves
 # ==============================
@@ -51,22 +81,28 @@ CANDIDATE_MOVES = [
     MOVE_1, MOVE_2, MOVE_3, MOVE_4, THRESHOLD_MOVE,
     MOVE_6, MOVE_7, MOVE_8, MOVE_9
 ]
+CANDIDATE_LEVELS = list(range(-4, 5))  # Step indices of CANDIDATE_MOVES
 
 # ==============================
 # Trial Generation Function
 # ==============================
 
-def get_trial_moves(pair_count: int, direction: Literal["forward", "backward", "left", "right"]) -> List[List[List[int]]]:
+def get_trial_moves(pair_count: int, direction: Literal["forward", "backward", "left", "right"],
+                    levels=None, rng=None) -> List[List[List[int]]]:
     """
     Generates trial movement pairs for the given direction.
 
     Each move generates two trials:
     - threshold -> move (label 1)
     - move -> threshold (label 2)
+
+    levels are step indices (CANDIDATE_LEVELS if None); rng is the
+    random.Random used for the shuffle (the global random module if None).
     """
     trial_moves = []
+    moves = CANDIDATE_MOVES if levels is None else [calculate_move(level) for level in levels]
 
-    for move in CANDIDATE_MOVES:
+    for move in moves:
 
         # Determine main move and threshold based on direction
         if direction in ["forward", "right"]:
@@ -83,9 +119,41 @@ def get_trial_moves(pair_count: int, direction: Literal["forward", "backward", "
             trial_moves.append([threshold, main_move, 1])  # Threshold first
             trial_moves.append([main_move, threshold, 2])  # Move first
 
-    random.shuffle(trial_moves)
+    (rng or random).shuffle(trial_moves)
     return trial_moves
 
+def get_adaptive_trial_moves(max_trials: int, direction: Literal["forward", "backward", "left", "right"],
+                             method="staircase", seed=None, **method_args):
+    """
+    Adaptive alternative to get_trial_moves.
+
+    Comparison levels in STEP_SIZE_MM steps are chosen as responses arrive,
+    by interleaved up-down staircases (method="staircase") or by the psi
+    method over CANDIDATE_LEVELS (method="psi"). The UI consumes the result
+    like the list from get_trial_moves and reports each response through
+    record(). method_args go to psychophysics.staircase.Staircase or
+    psychophysics.psi.PsiMethod.
+    """
+    if direction not in ["forward", "backward", "left", "right"]:
+        raise ValueError("Direction must be 'forward', 'backward', 'left', or 'right'")
+
+    def make_trial(level, std_idx):
+        main_move = calculate_move(level)
+        threshold = THRESHOLD_MOVE
+        if direction in ["backward", "left"]:
+            main_move = opposite_move(main_move)
+            threshold = opposite_move(threshold)
+        if std_idx == 1:
+            return [threshold, main_move, 1]  # Threshold first
+        return [main_move, threshold, 2]      # Move first
+
+    if method == "psi":
+        from psychophysics.psi import PsiTrials  # needs numpy
+        return PsiTrials(make_trial, CANDIDATE_LEVELS, max_trials=max_trials, seed=seed, **method_args)
+    if method != "staircase":
+        raise ValueError("Method must be 'staircase' or 'psi'")
+    return StaircaseTrials(make_trial, max_trials=max_trials, seed=seed, **method_args)
+
 # ==============================
 # Main Function
 # ==============================
@@ -0,0 +1,164 @@
+import array
+import bisect
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from psychophysics.interleave import InterleavedTrials
+from params import get_trial_moves, move_to_mm, CANDIDATE_LEVELS, PRE_TRIAL_MOVES, DIRECTION_MOTORS
+
+
+def session_spec(pair_count=4, interleaved=False, seed=None, levels=CANDIDATE_LEVELS,
+                 stages=("forward", "backward", "left", "right"), speed=(100, 500)):
+    """
+    Declarative description of a constant-stimuli session; compile_session turns it into a SessionPlan.
+    Plain JSON types only, so it can be stored in the journal header and compiled again on resume.
+    :param speed: Profile velocity policy, as for DynamixelController
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    return {
+        "stages": list(stages),
+        "levels": list(levels),
+        "pair_count": pair_count,
+        "pre_trials": {stage: PRE_TRIAL_MOVES[stage] for stage in stages},
+        "motors": {stage: DIRECTION_MOTORS[stage] for stage in stages},
+        "interleaved": interleaved,
+        "speed": list(speed) if isinstance(speed, (tuple, list)) else speed,
+        "seed": seed
+    }
+
+
+def _frozen(typecode, values):
+    return memoryview(array.array(typecode, values)).toreadonly()
+
+
+class SessionPlan:
+    """
+    Every trial of a session in presentation order, compiled once from a spec.
+
+    Trial i of the whole session is described by flat read-only arrays:
+    goal1[i] / goal2[i] (the stimulus positions given to move_to_position as
+    [goal, 0]), std_idx[i], speed1[i] / speed2[i] (profile velocity of each
+    stimulus), mm1[i] / mm2[i] (the labels in the result file) and
+    direction[i] (index into directions). Block b covers
+    block_starts[b]:block_starts[b + 1]. Nothing is drawn or converted while
+    the session runs.
+    """
+
+    def __init__(self, spec, blocks, pre_trials, speed_rng):
+        """
+        Use compile_session.
+        :param blocks: [(block name, [(direction, [pos1, pos2, std_idx]), ...]), ...]
+        :param pre_trials: {block name: [pos1, pos2]}
+        :param speed_rng: random.Random drawing the velocities
+        """
+        self.spec = spec
+        self.stages = tuple(name for name, _ in blocks)
+        self.directions = tuple(spec["stages"])
+        self.motors = dict(spec["motors"])
+
+        def draw_speed():
+            speed = spec["speed"]
+            return speed_rng.randint(*speed) if isinstance(speed, list) else speed
+
+        trials = [trial for _, block in blocks for trial in block]
+        starts = [0]
+        for _, block in blocks:
+            starts.append(starts[-1] + len(block))
+        self.block_starts = _frozen("I", starts)
+        self.direction = _frozen("B", [self.directions.index(d) for d, _ in trials])
+        self.goal1 = _frozen("i", [t[0][0] for _, t in trials])
+        self.goal2 = _frozen("i", [t[1][0] for _, t in trials])
+        self.std_idx = _frozen("B", [t[2] for _, t in trials])
+        self.mm1 = _frozen("d", [move_to_mm(t[0]) for _, t in trials])
+        self.mm2 = _frozen("d", [move_to_mm(t[1]) for _, t in trials])
+        self.speed1 = _frozen("H", [draw_speed() for _ in trials])
+        self.speed2 = _frozen("H", [draw_speed() for _ in trials])
+        self.pre_trials = {name: (tuple(pos[0] for pos in pre_trials[name]),
+                                  (draw_speed(), draw_speed())) for name in self.stages}
+
+    def __len__(self):
+        return len(self.goal1)
+
+    def block_range(self, stage):
+        """
+        (first, end) trial index of a block.
+        """
+        b = self.stages.index(stage)
+        return self.block_starts[b], self.block_starts[b + 1]
+
+    def locate(self, index):
+        """
+        Block and position in it of the trial after index completed ones, for a resume.
+        A finished block stays current (trial count = its length) until the rest page.
+        :return: (block index, trials done in that block)
+        """
+        b = max(bisect.bisect_left(self.block_starts, index, 0, len(self.stages)) - 1, 0)
+        return b, index - self.block_starts[b]
+
+    def trial(self, i):
+        """
+        Trial i as [pos1, pos2, std_idx], the layout of get_trial_moves.
+        """
+        return [[self.goal1[i], 0], [self.goal2[i], 0], self.std_idx[i]]
+
+    def speeds(self, i):
+        return self.speed1[i], self.speed2[i]
+
+    def direction_of(self, i):
+        return self.directions[self.direction[i]]
+
+    def pre_trial(self, stage):
+        """
+        Practice pair of a block as ([pos1, pos2], (speed1, speed2)).
+        """
+        goals, speeds = self.pre_trials[stage]
+        return [[goal, 0] for goal in goals], speeds
+
+    def controller_dict(self, controllers):
+        """
+        Controller per direction and per block for ExperimentUI.
+        :param controllers: {motor name: controller}, e.g. {"depth": controller_D, "horizontal": controller_H}
+        """
+        result = {d: controllers[self.motors[d]] for d in self.directions}
+        for b, stage in enumerate(self.stages):
+            first = self.block_starts[b]
+            result.setdefault(stage, result[self.direction_of(first)] if first < len(self) else None)
+        return result
+
+
+def compile_session(spec):
+    """
+    Build the SessionPlan of a spec (see session_spec). The same spec always
+    gives the same plan: the trial order comes from random.Random(seed), as in
+    main.build_session, and the velocities from random.Random(seed + 5).
+    """
+    seed = spec["seed"]
+    rng = random.Random(seed)
+    trials = {stage: get_trial_moves(spec["pair_count"], stage, levels=spec["levels"], rng=rng)
+              for stage in spec["stages"]}
+
+    if spec["interleaved"]:
+        # One block, one practice (the first direction's); order as InterleavedTrials draws it
+        interleaved = InterleavedTrials(trials, seed=seed)
+        blocks = [("interleaved", [(interleaved.current_track, trial) for trial in interleaved])]
+        pre_trials = {"interleaved": spec["pre_trials"][spec["stages"][0]]}
+    else:
+        blocks = [(stage, [(stage, trial) for trial in trials[stage]]) for stage in spec["stages"]]
+        pre_trials = spec["pre_trials"]
+
+    return SessionPlan(spec, blocks, pre_trials, random.Random(seed + 5))
+
+
+# ---------------------- Example Usage -------------------------
+
+if __name__ == '__main__':
+    plan = compile_session(session_spec(pair_count=2, seed=42))
+    for stage in plan.stages:
+        first, end = plan.block_range(stage)
+        print(f"\n=== {stage.capitalize()} Trials ===")
+        for i in range(first, end):
+            print(f"Trial {i - first + 1}: {plan.trial(i)}  {plan.mm1[i]}mm vs {plan.mm2[i]}mm  "
+                  f"velocity {plan.speeds(i)}")
@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import multiprocessing
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+class Rig:
+    """
+    One haptic rig (its serial port and motor calibration) and the participant on it.
+    """
+
+    def __init__(self, name, port, participant, mid_offsets=None, resume=None):
+        """
+        :param mid_offsets: (horizontal, depth) raw centre positions; MOTOR_H / MOTOR_D if None
+        :param resume: Journal of an interrupted session on this rig
+        """
+        self.name = name
+        self.port = port
+        self.participant = participant
+        self.mid_offsets = mid_offsets
+        self.resume = resume
+
+    @classmethod
+    def parse(cls, text, index):
+        """
+        Rig from a command-line argument PORT[@H,D]=PARTICIPANT[=JOURNAL], e.g. COM4=P02,
+        or COM4@1010,975=P02 for a rig whose horizontal / depth motors centre on raw 1010 / 975.
+        """
+        fields = text.split("=", 2)
+        if len(fields) < 2:
+            raise ValueError(f"Expected PORT[@H,D]=PARTICIPANT[=JOURNAL], got '{text}'")
+        port, _, offsets = fields[0].partition("@")
+        mid_offsets = None
+        if offsets:
+            try:
+                mid_offsets = tuple(int(v) for v in offsets.split(","))
+            except ValueError:
+                mid_offsets = ()
+            if len(mid_offsets) != 2:
+                raise ValueError(f"Expected two raw centre positions H,D after '@', got '{offsets}'")
+        return cls(f"rig{index}", port, fields[1], mid_offsets=mid_offsets,
+                   resume=fields[2] if len(fields) > 2 else None)
+
+    def motors(self):
+        """
+        (horizontal, depth) MotorConfig with this rig's calibration.
+        """
+        from dxl_control.controller import MotorConfig, MOTOR_H, MOTOR_D  # loads the SDK, so only in the rig process
+        if self.mid_offsets is None:
+            return MOTOR_H, MOTOR_D
+        return tuple(MotorConfig(motor.dxl_id, offset, motor.min_position, motor.max_position,
+                                 name=f"{self.name} {motor.name}")
+                     for motor, offset in zip((MOTOR_H, MOTOR_D), self.mid_offsets))
+
+    def __repr__(self):
+        return (f"Rig(name='{self.name}', port='{self.port}', participant='{self.participant}', "
+                f"mid_offsets={self.mid_offsets})")
+
+
+def run_rig(rig, updates, simulate=False):
+    """
+    Worker process: one complete session on one rig, with its own bus, Tk
+    window, plan and journal. State changes and every trial are reported
+    as dicts on the updates queue.
+    :param simulate: Run a headless simulated session instead (no motors, no window)
+    """
+    def report(**fields):
+        updates.put(dict(fields, rig=rig.name, time=time.time()))
+
+    def progress(record, done, total):
+        report(state="running", block=record.get("block", record["stage"]), trial=done, of=total,
+               response=record["response"], rt=record.get("rt"))
+
+    report(state="starting", pid=os.getpid())
+    try:
+        if simulate:
+            from headless import SimulatedObserver, run_session
+            filename = f"Results/{rig.participant}_simulated.txt"
+            run_session(SimulatedObserver(), filename=filename, progress=progress)
+        else:
+            from main import main
+            filename = main(rig.resume, port=rig.port, participant=rig.participant, motors=rig.motors(),
+                            progress=progress)
+    except Exception as e:
+        report(state="failed", error=str(e))
+        return
+    if filename:
+        report(state="done", result=filename)
+    else:
+        report(state="failed", error="session did not finish, see the rig's console output")
+
+
+class Orchestrator:
+    """
+    Runs one session per rig concurrently, each in its own process, and
+    keeps the latest status of every rig for the monitoring views.
+
+    Processes are started with "spawn", so every rig gets a fresh
+    interpreter: its own Tk root, DynamixelBus, motion worker and journal,
+    and a crash on one rig cannot take the others down.
+    """
+
+    FINAL_STATES = ("done", "failed", "exited")
+
+    def __init__(self, rigs, simulate=False):
+        names = [rig.name for rig in rigs]
+        ports = [rig.port for rig in rigs]
+        if len(set(names)) != len(names) or len(set(ports)) != len(ports):
+            raise ValueError("Every rig needs its own name and serial port")
+        self.rigs = {rig.name: rig for rig in rigs}
+        context = multiprocessing.get_context("spawn")
+        self.updates = context.Queue()
+        self.processes = {rig.name: context.Process(target=run_rig, args=(rig, self.updates, simulate),
+                                                    name=rig.name)
+                          for rig in rigs}
+        self.status = {rig.name: {"state": "pending"} for rig in rigs}
+        self.started = None
+
+    def start(self):
+        self.started = time.time()
+        for process in self.processes.values():
+            process.start()
+
+    def poll(self):
+        """
+        Apply queued updates. A process that ended without a final report
+        (killed, or crashed in the interpreter) is marked "exited".
+        :return: True if anything changed
+        """
+        changed = False
+        while True:
+            try:
+                update = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            self.status[update.pop("rig")].update(update)
+            changed = True
+        for name, process in self.processes.items():
+            status = self.status[name]
+            if process.exitcode is not None and status["state"] not in self.FINAL_STATES and self.updates.empty():
+                status.update(state="exited", error=f"exit code {process.exitcode}")
+                changed = True
+        return changed
+
+    @property
+    def finished(self):
+        return all(status["state"] in self.FINAL_STATES for status in self.status.values())
+
+    def join(self):
+        for process in self.processes.values():
+            process.join()
+
+    def rows(self):
+        """
+        One row of display strings per rig: rig, port, participant, state, block, trial, last response, RT, detail.
+        """
+        rows = []
+        for name, rig in self.rigs.items():
+            status = self.status[name]
+            rt = status.get("rt")
+            trial = f"{status['trial']}/{status['of']}" if "trial" in status else ""
+            detail = status.get("error") or status.get("result") or ""
+            rows.append((name, rig.port, rig.participant, status["state"], status.get("block", ""), trial,
+                         status.get("response", ""), f"{rt:.3f}s" if rt is not None and rt == rt else "",
+                         detail))
+        return rows
+
+
+HEADINGS = ("Rig", "Port", "Participant", "State", "Block", "Trial", "Last response", "RT", "Detail")
+
+
+def monitor_console(orchestrator, interval=1.0):
+    """
+    Print the status table whenever it changes, until every rig has finished.
+    """
+    while True:
+        if orchestrator.poll():
+            elapsed = time.time() - orchestrator.started
+            print(f"\n---- Rigs after {elapsed:.0f} s ----")
+            for row in [HEADINGS] + orchestrator.rows():
+                print("  ".join(f"{cell:<14}" for cell in row[:-1]) + f"  {row[-1]}")
+        if orchestrator.finished:
+            return
+        time.sleep(interval)
+
+
+def monitor_window(orchestrator, refresh_ms=200):
+    """
+    Tk window with one row per rig, refreshed from the update queue.
+    """
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.title("Rig monitor")
+    table = tk.Frame(root)
+    table.pack(padx=20, pady=20)
+    for column, heading in enumerate(HEADINGS):
+        tk.Label(table, text=heading, font=("Helvetica", 14, "bold")).grid(row=0, column=column, padx=8, sticky="w")
+    cells = [[tk.Label(table, font=("Helvetica", 14)) for _ in HEADINGS] for _ in orchestrator.rigs]
+    for row, labels in enumerate(cells, start=1):
+        for column, label in enumerate(labels):
+            label.grid(row=row, column=column, padx=8, sticky="w")
+    footer = tk.Label(root, font=("Helvetica", 12))
+    footer.pack(pady=(0, 10))
+
+    def refresh():
+        orchestrator.poll()
+        for labels, row in zip(cells, orchestrator.rows()):
+            for label, text in zip(labels, row):
+                label.config(text=text)
+        elapsed = time.time() - orchestrator.started
+        footer.config(text=f"{elapsed / 60:.1f} min" + ("  -  all sessions finished" if orchestrator.finished else ""))
+        root.after(refresh_ms, refresh)
+
+    refresh()
+    root.mainloop()
+
+
+# ---------------------- Example Usage -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run one PSE session per rig in parallel.")
+    parser.add_argument("rigs", nargs="+", help="PORT[@H,D]=PARTICIPANT[=JOURNAL], e.g. COM3=P01 COM4@1010,975=P02")
+    parser.add_argument("--console", action="store_true", help="Print the status table instead of a monitor window")
+    parser.add_argument("--simulate", action="store_true", help="Headless simulated sessions, no motors")
+    args = parser.parse_args()
+
+    orchestrator = Orchestrator([Rig.parse(text, i) for i, text in enumerate(args.rigs, start=1)],
+                                simulate=args.simulate)
+    orchestrator.start()
+    if args.console:
+        monitor_console(orchestrator)
+    else:
+        monitor_window(orchestrator)
+    orchestrator.join()
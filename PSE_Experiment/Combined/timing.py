@@ -0,0 +1,100 @@
+import time
+
+
+class TimingEngine:
+    """
+    Drift-free timing for the experiment UI, built on time.perf_counter.
+
+    Stimuli are started at absolute deadlines on the motion worker thread
+    (sleep, then spin for the last few milliseconds), and the actual onset
+    and offset of every stimulus is measured there. An inter-stimulus interval
+    is counted from the measured offset of the previous stimulus, so it does
+    not depend on how long the move took or on Tk event latency. UI delays
+    are scheduled against absolute deadlines too, so they never accumulate.
+    """
+
+    SPIN_THRESHOLD = 0.002  # seconds before a deadline to stop sleeping and spin
+    CLOCK_RESYNC   = 1.0    # seconds; a larger jump in the event clock offset means it was reset or wrapped
+
+    def __init__(self, root, motion):
+        """
+        :param root: Tk root, for call_at
+        :param motion: MotionWorker that runs the stimuli
+        """
+        self.root = root
+        self.motion = motion
+        self.lateness = []        # onset - deadline of every stimulus, seconds
+        self._last_offset = None  # only touched on the motion worker thread
+        self._event_offset = None # perf_counter - Tk event.time, smallest seen
+
+    @staticmethod
+    def now():
+        return time.perf_counter()
+
+    def call_at(self, deadline, fn):
+        """
+        Run fn on the Tk thread at an absolute perf_counter deadline.
+        """
+        delay_ms = max(0, int(round((deadline - self.now()) * 1000)))
+        return self.root.after(delay_ms, fn)
+
+    def event_time(self, event):
+        """
+        perf_counter time at which a Tk key/mouse event happened, from its
+        event.time field (milliseconds on the window system clock).
+
+        The two clocks are aligned by the smallest offset seen so far, i.e.
+        the event that was handled fastest. Returns (timestamp, latency), where
+        latency is how long the event waited before the handler ran.
+        """
+        now = self.now()
+        offset = now - event.time / 1000.0
+        if (self._event_offset is None or offset < self._event_offset
+                or offset - self._event_offset > self.CLOCK_RESYNC):
+            self._event_offset = offset
+        timestamp = event.time / 1000.0 + self._event_offset
+        return timestamp, now - timestamp
+
+    def play_at(self, deadline, controller, target, callback, speed=None):
+        """
+        Start a stimulus at an absolute deadline.
+        callback((onset, offset)) runs on the Tk thread when the motor is back.
+        speed is the profile velocity (the controller's speed policy if None).
+        """
+        self.motion.submit(self._play, deadline, None, controller, target, speed, callback=callback)
+
+    def play_after_previous(self, interval, controller, target, callback, speed=None):
+        """
+        Start a stimulus interval seconds after the offset of the previous one.
+        """
+        self.motion.submit(self._play, None, interval, controller, target, speed, callback=callback)
+
+    def _play(self, deadline, interval, controller, target, speed=None):
+        if deadline is None:
+            deadline = (self._last_offset or self.now()) + interval
+        self._sleep_until(deadline)
+        onset = self.now()
+        if speed is None:
+            controller.move_to_position(target)
+        else:
+            controller.move_to_position(target, speed=speed)
+        offset = self.now()
+        self._last_offset = offset
+        self.lateness.append(onset - deadline)
+        return onset, offset
+
+    def _sleep_until(self, deadline):
+        while True:
+            remaining = deadline - self.now()
+            if remaining <= 0:
+                return
+            if remaining > self.SPIN_THRESHOLD:
+                time.sleep(remaining - self.SPIN_THRESHOLD)
+
+    def summary(self):
+        if not self.lateness:
+            return "Stimulus onsets: none"
+        ordered = sorted(self.lateness)
+        mean = sum(ordered) / len(ordered)
+        return (f"Stimulus onsets: {len(ordered)}, lateness mean {mean * 1000:.3f} ms, "
+                f"max {ordered[-1] * 1000:.3f} ms")
@@ -1,7 +1,13 @@
+import os
+import sys
+import time
 import tkinter as tk
 from D_params import get_trial_moves
 from typing import List, Literal
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from dxl_control.worker import MotionWorker
+
 # DummyController for testing
 class DummyController:
     def read_current_position(self):
@@ -20,6 +26,9 @@ class ExperimentUI:
         self.root.title("Interactive UI")
         self.root.geometry("1280x720")
 
+        # Stimuli run on a background thread so the window keeps repainting
+        self.motion = MotionWorker(self.root)
+
         self.stage = "forward"  # forward -> rest -> backward
         self.trial_count = 0
         self.responses = []
@@ -32,6 +41,8 @@ class ExperimentUI:
         self.trial_move_values = self.forward_trials
         self.pre_trial_move_value = self.forward_pre_trial
         self.MAX_TRIALS = len(self.trial_move_values)
+        self.trial_iter = iter(self.trial_move_values)  # adaptive sequences build each trial on demand
+        self.fetched_trial = -1  # trial_count of current_trial_pair
 
         self.phase_stage = 0
 
@@ -98,18 +109,20 @@ class ExperimentUI:
         self.root.bind("<space>", self.handle_pre_trial_space)
 
     def handle_pre_trial_space(self, event):
+        if self.motion.busy:
+            return  # ignore SPACE while a stimulus is playing
         if self.phase_stage == 0:
             self.pre_trial_label.config(text="\n\n First stimulation triggered. Press SPACE for the second stimulation.")
-            self.controller.move_to_position(self.pre_trial_move_value[0])
-            self.phase_stage = 1
+            self._play_stimulus(self.pre_trial_move_value[0], next_phase=1)
         elif self.phase_stage == 1:
             self.pre_trial_label.config(text="\n\n Second stimulation triggered. Now please make your choice.")
-            self.controller.move_to_position(self.pre_trial_move_value[1])
-            self.phase_stage = 2
-            self.l_button.config(state=tk.NORMAL)
-            self.s_button.config(state=tk.NORMAL)
+            self._play_stimulus(self.pre_trial_move_value[1], next_phase=2,
+                                buttons=(self.l_button, self.s_button))
 
     def show_result(self):
+        # A second click during the wait would schedule the trial page twice and skip a trial
+        self.l_button.config(state=tk.DISABLED)
+        self.s_button.config(state=tk.DISABLED)
         self.result_label.config(text="Pre-experiment finished. Let's proceed to the formal experiment.")
         self.root.after(4000, self.goto_trial_page)
 
@@ -119,9 +132,10 @@ class ExperimentUI:
 
     def show_trial_page(self):
         self.trial_frame.pack(expand=True, fill='both')
-        if self.trial_count < self.MAX_TRIALS:
-            pos1, pos2, std_idx = self.trial_move_values[self.trial_count]
+        if self.trial_count < self.MAX_TRIALS and self.fetched_trial != self.trial_count:
+            pos1, pos2, std_idx = next(self.trial_iter)
             self.current_trial_pair = (pos1, pos2, std_idx)
+            self.fetched_trial = self.trial_count  # showing the page again keeps the same trial
         self.phase_stage = 0
         self.option1_button.config(state=tk.DISABLED)
         self.option3_button.config(state=tk.DISABLED)
@@ -129,19 +143,37 @@ class ExperimentUI:
         self.trial_label.config(text=f"Trial {self.trial_count + 1}/{self.MAX_TRIALS}: \n\n Press SPACE to receive the first stimulation.")
 
     def handle_trial_space(self, event):
+        if self.motion.busy:
+            return  # ignore SPACE while a stimulus is playing
         pos1, pos2, std_idx = self.current_trial_pair
         if self.phase_stage == 0:
             self.trial_label.config(text=f"Trial {self.trial_count + 1}/{self.MAX_TRIALS}: \n\n First stimulation triggered. Press SPACE for the second stimulation.")
-            self.controller.move_to_position(self.current_trial_pair[0])
-            self.phase_stage = 1
+            self._play_stimulus(self.current_trial_pair[0], next_phase=1)
         elif self.phase_stage == 1:
             self.trial_label.config(text=f"Trial {self.trial_count + 1}/{self.MAX_TRIALS}: \n\n Second stimulation triggered. Now please make your choice.")
-            self.controller.move_to_position(self.current_trial_pair[1])
-            self.phase_stage = 2
-            self.option1_button.config(state=tk.NORMAL)
-            self.option3_button.config(state=tk.NORMAL)
+            self._play_stimulus(self.current_trial_pair[1], next_phase=2,
+                                buttons=(self.option1_button, self.option3_button))
+
+    def _play_stimulus(self, target, next_phase, buttons=()):
+        """
+        Play one stimulus on the motion worker. SPACE is ignored until the
+        motor arrives; then the phase advances and the buttons are enabled.
+        The arrival time (perf_counter, taken on the worker) is kept for the RT.
+        """
+        def on_done(offset):
+            self.stim_offset = offset if offset is not None else float("nan")
+            self.phase_stage = next_phase
+            for button in buttons:
+                button.config(state=tk.NORMAL)
+
+        self.motion.submit(self._move_and_stamp, target, callback=on_done)
+
+    def _move_and_stamp(self, target):
+        self.controller.move_to_position(target)
+        return time.perf_counter()
 
     def handle_trial_response(self, response: str):
+        response_time = time.perf_counter()
         pos1, pos2, std_idx = self.current_trial_pair
         self.responses.append({
             "trial": self.trial_count + 1,
@@ -149,8 +181,12 @@ class ExperimentUI:
             "pos2": pos2,
             "std_idx": std_idx,
             "response": response,
-            "stage": self.stage
+            "stage": self.stage,
+            "response_time": response_time,
+            "rt": response_time - self.stim_offset  # from the end of the second stimulus
         })
+        if hasattr(self.trial_move_values, "record"):
+            self.trial_move_values.record(response)  # adaptive sequence picks the next level
         self.trial_count += 1
         self.trial_frame.pack_forget()
         self.root.unbind("<space>")
@@ -174,6 +210,8 @@ class ExperimentUI:
         self.trial_move_values = self.backward_trials
         self.pre_trial_move_value = self.backward_pre_trial
         self.MAX_TRIALS = len(self.trial_move_values)
+        self.trial_iter = iter(self.trial_move_values)
+        self.fetched_trial = -1
         self.show_pre_trial_page()
 
     def show_final_page(self):
@@ -182,8 +220,10 @@ class ExperimentUI:
     def run(self):
         if self.controller:
             current_pos = self.controller.read_current_position()
-            self.controller.move_to_position([current_pos, 0])
+            self.motion.submit(self.controller.move_to_position, [current_pos, 0])
+
         self.root.mainloop()
+        self.motion.stop()
 
 
 if __name__ == '__main__':
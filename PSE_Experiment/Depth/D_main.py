@@ -3,15 +3,19 @@ import os
 from D_controller import DynamixelController
 from D_experiment_ui import ExperimentUI
 from D_params import get_trial_moves, STEP_SIZE_MM, STEP_SIZE, THRESHOLD_MM, THRESHOLD_POSITION
+from psychophysics.results import write_trials
 
-def generate_result_file(responses, filename="Results/depth_result.txt"):
+def generate_result_file(responses, filename="Results/depth_result.txt", bus_summary=None):
     """
     Generate a result file grouped into forward/backward trials with mm values.
+    bus_summary (lines from DynamixelBus.packet_summary) is appended as its own section.
+    Every trial field is also written to a columnar <name>_trials file (psychophysics.results).
     """
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
     forward_section = []
     backward_section = []
+    rows = []
 
     for res in responses:
         trial   = res["trial"]
@@ -26,10 +30,15 @@ def generate_result_file(responses, filename="Results/depth_result.txt"):
 
         mm1 = vec_to_mm(pos1)
         mm2 = vec_to_mm(pos2)
+        rows.append(dict(res, mm1=mm1, mm2=mm2))
 
-        # "Trial 2: 4.9mm vs 5.5mm  2  Second Greater"
+        # "Trial 2: 4.9mm vs 5.5mm  2  Second Greater  RT 0.532s"
         line = f"Trial {trial}: {mm1}mm vs {mm2}mm  {std_idx}  {response}"
 
+        rt = res.get("rt")
+        if rt is not None and rt == rt:  # skip missing / NaN
+            line += f"  RT {rt:.3f}s"
+
         if stage == "forward":
             forward_section.append(line)
         else:
@@ -46,7 +55,13 @@ def generate_result_file(responses, filename="Results/depth_result.txt"):
             for line in backward_section:
                 f.write(line + "\n")
 
+        if bus_summary:
+            f.write("\n=== Bus Statistics ===\n")
+            for line in bus_summary:
+                f.write(line + "\n")
+
     print(f"Results saved to {filename}")
+    write_trials(rows, os.path.splitext(filename)[0] + "_trials")
 
 
 
@@ -75,8 +90,8 @@ def main():
         )
         ui.run()
 
-        generate_result_file(ui.responses, filename="Results/Will_D.txt")
-        # generate_result_file(ui.responses, filename="Results/Kevin_D.txt")
+        generate_result_file(ui.responses, filename="Results/Will_D.txt", bus_summary=controller.bus.packet_summary())
+        # generate_result_file(ui.responses, filename="Results/Kevin_D.txt", bus_summary=controller.bus.packet_summary())
     except Exception as e:
         print("An error occurred during the experiment:", e)
     finally:
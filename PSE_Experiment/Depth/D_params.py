@@ -1,6 +1,11 @@
+import os
 import random
+import sys
 from typing import List, Literal
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from psychophysics.staircase import StaircaseTrials
+
 # Constants
 STEP_SIZE_MM = 0.2
 STEP_SIZE = 600 / 9
@@ -34,6 +39,7 @@ CANDIDATE_MOVES = [
     MOVE_1, MOVE_2, MOVE_3, MOVE_4, THRESHOLD_MOVE,
     MOVE_6, MOVE_7, MOVE_8, MOVE_9
 ]
+CANDIDATE_LEVELS = list(range(-4, 5))  # Step indices of CANDIDATE_MOVES
 
 def get_trial_moves(pair_count: int, direction: Literal["forward", "backward"]) -> List[List[List[int]]]:
     """
@@ -65,6 +71,33 @@ def get_trial_moves(pair_count: int, direction: Literal["forward", "backward"])
     random.shuffle(trial_moves)
     return trial_moves
 
+def get_adaptive_trial_moves(max_trials: int, direction: Literal["forward", "backward"],
+                             method="staircase", seed=None, **method_args):
+    """
+    Adaptive alternative to get_trial_moves: interleaved up-down staircases
+    (method="staircase") or the psi method over CANDIDATE_LEVELS (method="psi"),
+    in STEP_SIZE_MM steps, one trial generated per response (see record()).
+    """
+    if direction not in ["forward", "backward"]:
+        raise ValueError("Direction must be 'forward' or 'backward'")
+
+    def make_trial(level, std_idx):
+        main_move = calculate_move(level)
+        threshold = THRESHOLD_MOVE
+        if direction == "backward":
+            main_move = backward_move(main_move)
+            threshold = backward_move(threshold)
+        if std_idx == 1:
+            return [threshold, main_move, 1]
+        return [main_move, threshold, 2]
+
+    if method == "psi":
+        from psychophysics.psi import PsiTrials  # needs numpy
+        return PsiTrials(make_trial, CANDIDATE_LEVELS, max_trials=max_trials, seed=seed, **method_args)
+    if method != "staircase":
+        raise ValueError("Method must be 'staircase' or 'psi'")
+    return StaircaseTrials(make_trial, max_trials=max_trials, seed=seed, **method_args)
+
 
 def main() -> None:
     pair_count = 2  # Should be even
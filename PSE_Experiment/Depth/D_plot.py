@@ -1,9 +1,14 @@
 import os
 import re
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from psychophysics.analysis import count_mixed_logic_abs
+from psychophysics.bootstrap import bootstrap_conditions
+from psychophysics.fitting import fit_conditions, logistic
 
 def load_and_parse_abs(filename):
     """
@@ -14,7 +19,7 @@ def load_and_parse_abs(filename):
     rows = []
     current_stage = None
     pattern = re.compile(
-        r"Trial\s+(\d+):\s+(-?[\d\s]+\.\d+)mm\s+vs\s+(-?[\d\s]+\.\d+)mm\s+([12])\s+(First Greater|Second Greater)"
+        r"Trial\s+(\d+):\s+(-?[\d\s]+\.\d+)mm\s+vs\s+(-?[\d\s]+\.\d+)mm\s+([12])\s+(First Greater|Second Greater)(?:\s+RT\s+([\d.]+)s)?"
     )
     with open(filename, 'r', encoding='utf-8') as f:
         for line in f:
@@ -30,7 +35,7 @@ def load_and_parse_abs(filename):
             if not m:
                 continue
 
-            trial, mm1_str, mm2_str, std_idx, resp_str = m.groups()
+            trial, mm1_str, mm2_str, std_idx, resp_str, rt_str = m.groups()
             mm1 = abs(float(mm1_str.replace(" ", "")))
             mm2 = abs(float(mm2_str.replace(" ", "")))
 
@@ -40,71 +45,27 @@ def load_and_parse_abs(filename):
                 'mm1':      mm1,
                 'mm2':      mm2,
                 'std_idx':  int(std_idx),
-                'resp_str': resp_str
+                'resp_str': resp_str,
+                'rt':       float(rt_str) if rt_str else np.nan
             })
 
     return pd.DataFrame(rows)
 
 
-def count_mixed_logic_abs(df, std_value=5.5):
-    """
-    For any trial where either mm1 or mm2 equals std_value (absolute),
-    exclude trials where both equal std_value.
-    Then:
-      - if test > std_value: count “correct” responses
-      - if test < std_value: count “incorrect” responses
-    Returns:
-      test_values: sorted array of test stimulus levels
-      counts: 2×N array where
-        counts[0, i] = total trial count at test_values[i]
-        counts[1, i] = accumulated correct/incorrect count
-    """
-    mask_std = (df['mm1'] == std_value) | (df['mm2'] == std_value)
-    df_std = df[mask_std & ~((df['mm1'] == std_value) & (df['mm2'] == std_value))].copy()
-
-    tests = np.where(df_std['mm1'] == std_value, df_std['mm2'], df_std['mm1'])
-    test_values = np.sort(np.unique(tests))
-
-    counts = np.zeros((2, len(test_values)), dtype=int)
-    index_map = {val: i for i, val in enumerate(test_values)}
-
-    for _, row in df_std.iterrows():
-        mm1, mm2, resp = row['mm1'], row['mm2'], row['resp_str']
-        test = mm2 if mm1 == std_value else mm1
-        idx = index_map[test]
-        counts[0, idx] += 1
-
-        correct = (
-            (resp == "First Greater"  and mm1 > mm2) or
-            (resp == "Second Greater" and mm2 > mm1)
-        )
-
-        if test > std_value:
-            if correct:
-                counts[1, idx] += 1
-        else:
-            if not correct:
-                counts[1, idx] += 1
-
-    return test_values, counts
-
-
-def logistic(x, x0, k):
-    """Standard logistic psychometric function."""
-    return 1.0 / (1.0 + np.exp(-k * (x - x0)))
-
-
 if __name__ == "__main__":
     filepath = os.path.join("Results", "Kevin_D.txt")
     df = load_and_parse_abs(filepath)
 
-    for label, subset in [
-        ("Forward only",  df[df['stage'] == "forward"]),
-        ("Backward only", df[df['stage'] == "backward"]),
-        ("Combined",      df)
-    ]:
-        # Compute counts and rates
-        x, counts = count_mixed_logic_abs(subset, std_value=5.5)
+    # Compute counts for every subset, then fit them all in one batch
+    subsets = {
+        "Forward only":   count_mixed_logic_abs(df[df['stage'] == "forward"], std_value=5.5),
+        "Backward only":  count_mixed_logic_abs(df[df['stage'] == "backward"], std_value=5.5),
+        "Combined":       count_mixed_logic_abs(df, std_value=5.5),
+    }
+    fits = fit_conditions(subsets)
+    intervals = bootstrap_conditions(subsets, n_boot=10000, seed=0)
+
+    for label, (x, counts) in subsets.items():
         y = counts[1] / counts[0]
 
         # Print summary arrays
@@ -114,25 +75,26 @@ if __name__ == "__main__":
         print(">5.5 correct / <5.5 incorrect:   ", counts[1])
         print("Response rates:                   ", np.round(y, 3))
 
-        # Fit logistic
-        initial_guess = [5.5, 1.0]
-        popt, _ = curve_fit(
-            logistic, x, y,
-            p0=initial_guess,
-            bounds=([0, 0], [np.inf, np.inf])
-        )
-        x0, k = popt
-        print(f"Threshold (50% point) x₀ = {x0:.3f} mm, slope k = {k:.3f}")
+        # Maximum-likelihood logistic fit
+        fit = fits[label]
+        x0, k = fit["x0"], fit["k"]
+        print(f"Threshold (50% point) x₀ = {x0:.3f} ± {fit['x0_se']:.3f} mm, slope k = {k:.3f} ± {fit['k_se']:.3f}")
+        if not fit["converged"]:
+            print("Warning: the fit did not converge (responses separate completely), the slope is unreliable")
+        ci = intervals[label]
+        print(f"95% CI (BCa, {ci['n_boot']} resamples): PSE [{ci['pse_bca'][0]:.3f}, {ci['pse_bca'][1]:.3f}] mm, "
+              f"JND = {ci['jnd']:.3f} [{ci['jnd_bca'][0]:.3f}, {ci['jnd_bca'][1]:.3f}] mm")
 
         # Plot
         plt.figure()
         plt.scatter(x, y, label="Data")
         x_fit = np.linspace(4.5, 6.5, 200)
-        y_fit = logistic(x_fit, *popt)
+        y_fit = logistic(x_fit, x0, k)
         plt.plot(x_fit, y_fit, '-', label="Logistic fit")
         plt.axhline(0.5, color='gray', linestyle='--')
         plt.axvline(x0, color='red', linestyle='--',
                     label=f"50% at {x0:.2f} mm")
+        plt.axvspan(*ci['pse_bca'], color='red', alpha=0.1, label="95% CI")
         plt.xlabel('Test stimulus (mm)')
         plt.ylabel('Response rate')
         plt.title(label)
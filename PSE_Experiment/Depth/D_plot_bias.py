@@ -1,15 +1,19 @@
 import os
 import re
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from psychophysics.analysis import count_mixed_logic_abs
+from psychophysics.fitting import fit_psychometric, logistic
 
 def load_and_parse_abs(filename):
     rows = []
     current_stage = None
     pattern = re.compile(
-        r"Trial\s+(\d+):\s+(-?[\d\s]+\.\d+)mm\s+vs\s+(-?[\d\s]+\.\d+)mm\s+([12])\s+(First Greater|Second Greater)"
+        r"Trial\s+(\d+):\s+(-?[\d\s]+\.\d+)mm\s+vs\s+(-?[\d\s]+\.\d+)mm\s+([12])\s+(First Greater|Second Greater)(?:\s+RT\s+([\d.]+)s)?"
     )
     with open(filename, 'r', encoding='utf-8') as f:
         for line in f:
@@ -23,7 +27,7 @@ def load_and_parse_abs(filename):
             m = pattern.match(line)
             if not m:
                 continue
-            trial, mm1_str, mm2_str, std_idx, resp_str = m.groups()
+            trial, mm1_str, mm2_str, std_idx, resp_str, rt_str = m.groups()
             mm1 = abs(float(mm1_str.replace(" ", "")))
             mm2 = abs(float(mm2_str.replace(" ", "")))
             rows.append({
@@ -32,7 +36,8 @@ def load_and_parse_abs(filename):
                 'mm1':      mm1,
                 'mm2':      mm2,
                 'std_idx':  int(std_idx),
-                'resp_str': resp_str
+                'resp_str': resp_str,
+                'rt':       float(rt_str) if rt_str else np.nan
             })
     return pd.DataFrame(rows)
 
@@ -51,33 +56,6 @@ def estimate_response_bias(df):
     )
     return is_test_greater.mean()
 
-def count_mixed_logic_abs(df, std_value=5.5):
-    mask_std = (df['mm1'] == std_value) | (df['mm2'] == std_value)
-    df_std = df[mask_std & ~((df['mm1']==std_value)&(df['mm2']==std_value))].copy()
-    tests = np.where(df_std['mm1']==std_value, df_std['mm2'], df_std['mm1'])
-    test_values = np.sort(np.unique(tests))
-    counts = np.zeros((2, len(test_values)), dtype=int)
-    idx_map = {v:i for i,v in enumerate(test_values)}
-    for _, row in df_std.iterrows():
-        mm1, mm2, resp = row['mm1'], row['mm2'], row['resp_str']
-        test = mm2 if mm1==std_value else mm1
-        idx = idx_map[test]
-        counts[0, idx] += 1
-        correct = (
-            (resp=="First Greater"  and mm1>mm2) or
-            (resp=="Second Greater" and mm2>mm1)
-        )
-        if test>std_value:
-            if correct:
-                counts[1, idx] += 1
-        else:
-            if not correct:
-                counts[1, idx] += 1
-    return test_values, counts
-
-def logistic(x, x0, k):
-    return 1.0 / (1.0 + np.exp(-k*(x-x0)))
-
 if __name__ == "__main__":
     filepath = os.path.join("Results", "Will_D.txt")
     df = load_and_parse_abs(filepath)
@@ -96,7 +74,8 @@ if __name__ == "__main__":
         gammas[label] = g
         print(f"Response bias γ for {label}: {g:.3f}")
 
-    # 2) draw
+    # 2) counts, bias-corrected rates and one batched fit of all of them
+    curves = {}
     for label, sub in subsets.items():
         gamma = gammas[label]
 
@@ -111,25 +90,37 @@ if __name__ == "__main__":
         else:
             y_corr = (y_orig - gamma) / denom
             y_corr = np.clip(y_corr, 0, 1)
+        curves[label] = (x, counts, y_orig, y_corr)
 
+    # 2c) maximum-likelihood fits, orig and corrected (as fractional counts) for every subset
+    width = max(len(x) for x, *_ in curves.values())
+    levels, n, greater = np.zeros((3, 2, len(curves), width))
+    for i, (x, counts, y_orig, y_corr) in enumerate(curves.values()):
         mask = np.isfinite(y_corr)
-        x_fit, y_fit = x[mask], y_corr[mask]
-        p0 = [5.5, 1.0]
-        popt_o, _ = curve_fit(logistic, x, y_orig, p0=p0, bounds=([0,0],[np.inf,np.inf]))
-        popt_c, _ = curve_fit(logistic, x_fit, y_fit, p0=p0, bounds=([0,0],[np.inf,np.inf]))
-        x0_o, k_o = popt_o
-        x0_c, k_c = popt_c
+        levels[:, i, :len(x)] = x
+        n[0, i, :len(x)] = counts[0]
+        n[1, i, :len(x)] = np.where(mask, counts[0], 0)
+        greater[0, i, :len(x)] = counts[1]
+        greater[1, i, :len(x)] = np.where(mask, y_corr * counts[0], 0)
+    fits = fit_psychometric(levels, n, greater)
+
+    for i, (label, (x, counts, y_orig, y_corr)) in enumerate(curves.items()):
+        x0_o, k_o = fits["x0"][0, i], fits["k"][0, i]
+        x0_c, k_c = fits["x0"][1, i], fits["k"][1, i]
 
         print(f"\n--- {label} ---")
-        print(f" Orig PSE x₀={x0_o:.3f}, corrected PSE x₀={x0_c:.3f}")
+        print(f" Orig PSE x₀={x0_o:.3f} ± {fits['x0_se'][0, i]:.3f}, "
+              f"corrected PSE x₀={x0_c:.3f} ± {fits['x0_se'][1, i]:.3f}")
+        if not fits["converged"][:, i].all():
+            print(" Warning: a fit did not converge (responses separate completely), its PSE is unreliable")
 
         # 2d) draw
         plt.figure()
         plt.scatter(x, y_orig, label='Data (orig)', alpha=0.6)
         plt.scatter(x, y_corr, label='Data (corr)', alpha=0.6, marker='s')
         xf = np.linspace(x.min(), x.max(), 200)
-        plt.plot(xf, logistic(xf,*popt_o), '-', label='Fit (orig)')
-        plt.plot(xf, logistic(xf,*popt_c), '--', label='Fit (corr)')
+        plt.plot(xf, logistic(xf, x0_o, k_o), '-', label='Fit (orig)')
+        plt.plot(xf, logistic(xf, x0_c, k_c), '--', label='Fit (corr)')
         plt.axhline(gammas[label], color='gray', linestyle=':', label=f'γ={gammas[label]:.2f}')
         plt.axhline(1-gammas[label], color='gray', linestyle=':', label=f'1-γ={1-gammas[label]:.2f}')
         plt.axhline(0.5, color='black', linestyle='--')
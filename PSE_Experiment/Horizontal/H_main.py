@@ -3,15 +3,19 @@ import os
 from H_controller import DynamixelController
 from H_experiment_ui import ExperimentUI
 from H_params import get_trial_moves, STEP_SIZE_MM, STEP_SIZE, THRESHOLD_MM, THRESHOLD_POSITION
+from psychophysics.results import write_trials
 
-def generate_result_file(responses, filename):
+def generate_result_file(responses, filename, bus_summary=None):
     """
     Generate a result file grouped into left/right trials with mm values.
+    bus_summary (lines from DynamixelBus.packet_summary) is appended as its own section.
+    Every trial field is also written to a columnar <name>_trials file (psychophysics.results).
     """
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
     left_section = []
     right_section = []
+    rows = []
 
     for res in responses:
         trial = res["trial"]
@@ -25,9 +29,17 @@ def generate_result_file(responses, filename):
             displacement_mm = (raw - THRESHOLD_POSITION) / STEP_SIZE
             mm = round(THRESHOLD_MM + displacement_mm, 1)
             mm_values.append(mm)
+        # The report files the UI's left stage (positive moves) under "Right" and vice versa; the rows
+        # carry the report's label so load_trials and load_report agree
+        rows.append(dict(res, stage="right" if stage == "left" else "left",
+                         pos1=pair[0], pos2=pair[1], mm1=mm_values[0], mm2=mm_values[1]))
 
         line = f"Trial {trial}: {mm_values[0]}mm vs {mm_values[1]}mm {response}"
 
+        rt = res.get("rt")
+        if rt is not None and rt == rt:  # skip missing / NaN
+            line += f"  RT {rt:.3f}s"
+
         if stage == "left":
             left_section.append(line)
         else:
@@ -44,7 +56,13 @@ def generate_result_file(responses, filename):
             for line in right_section:
                 f.write(line + "\n")
 
+        if bus_summary:
+            f.write("\n=== Bus Statistics ===\n")
+            for line in bus_summary:
+                f.write(line + "\n")
+
     print(f"Results saved to {filename}")
+    write_trials(rows, os.path.splitext(filename)[0] + "_trials")
 
 
 def main():
@@ -72,8 +90,8 @@ def main():
         )
         ui.run()
 
-        # generate_result_file(ui.responses, filename="Results/Kevin_H.txt")
-        generate_result_file(ui.responses, filename="Results/Will_H.txt")
+        # generate_result_file(ui.responses, filename="Results/Kevin_H.txt", bus_summary=controller.bus.packet_summary())
+        generate_result_file(ui.responses, filename="Results/Will_H.txt", bus_summary=controller.bus.packet_summary())
     except Exception as e:
         print("An error occurred during the experiment:", e)
     finally:
@@ -0,0 +1,7 @@
+"""
+Shared Dynamixel control code used by the PSE experiments and the games.
+
+Import from the submodules directly (e.g. ``from dxl_control.bus import
+DynamixelBus``) so that modules which do not talk to the hardware, such as
+the motion worker, can be used without dynamixel_sdk installed.
+"""
@@ -0,0 +1,46 @@
+"""
+Select the Dynamixel SDK implementation the controllers talk to.
+
+Set the DXL_BACKEND environment variable before starting any experiment or game:
+
+    DXL_BACKEND=serial  real dynamixel_sdk on a serial port (default)
+    DXL_BACKEND=sim     software simulator from dxl_control.sim, no hardware
+    DXL_BACKEND=dryrun  simulator with instant motion that prints every write
+
+Controllers import PortHandler, PacketHandler, GroupSyncWrite, GroupSyncRead
+and COMM_SUCCESS from here instead of from dynamixel_sdk.
+"""
+import os
+from types import SimpleNamespace
+
+BACKENDS = ("serial", "sim", "dryrun")
+BACKEND = os.environ.get("DXL_BACKEND", "serial").lower()
+
+
+def load_sdk(backend=None):
+    """
+    Namespace holding the SDK classes of the requested backend.
+    """
+    backend = (backend or BACKEND).lower()
+    if backend in ("sim", "dryrun"):
+        from . import sim as sdk
+    elif backend == "serial":
+        import dynamixel_sdk as sdk
+    else:
+        raise ValueError(f"Unknown Dynamixel backend '{backend}', expected one of {BACKENDS}")
+    return SimpleNamespace(
+        name=backend,
+        PortHandler=sdk.DryRunPortHandler if backend == "dryrun" else sdk.PortHandler,
+        PacketHandler=sdk.PacketHandler,
+        GroupSyncWrite=sdk.GroupSyncWrite,
+        GroupSyncRead=sdk.GroupSyncRead,
+        COMM_SUCCESS=sdk.COMM_SUCCESS,
+    )
+
+
+_sdk = load_sdk()
+PortHandler = _sdk.PortHandler
+PacketHandler = _sdk.PacketHandler
+GroupSyncWrite = _sdk.GroupSyncWrite
+GroupSyncRead = _sdk.GroupSyncRead
+COMM_SUCCESS = _sdk.COMM_SUCCESS
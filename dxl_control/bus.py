@@ -0,0 +1,342 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .backend import load_sdk
+from .instrument import BusInstrumentation
+
+
+class DynamixelBus:
+    """
+    One serial bus shared by every motor on it.
+
+    The bus owns the PortHandler, so the port is opened and closed exactly once
+    no matter how many motors use it. Every packet goes through a single lock,
+    which makes concurrent callers safe, and commands can be queued per motor
+    ID so each motor's moves run in order on their own worker thread.
+    """
+
+    # Communication settings
+    PROTOCOL_VERSION = 2.0
+    BAUDRATE = 1000000
+    DEVICENAME = "COM3"
+
+    ADDR_TORQUE_ENABLE = 64
+    ADDR_GOAL_POSITION = 116
+    # Registers the motor never changes on its own, so a write of the value it
+    # already holds can be skipped: {address: size in bytes}. Not Torque Enable,
+    # which the motor clears itself on a hardware-error shutdown.
+    SHADOWED_REGISTERS = {
+        108: 4,   # Profile Acceleration
+        112: 4,   # Profile Velocity
+        116: 4,   # Goal Position
+    }
+
+    def __init__(self, devicename=None, baudrate=None, backend=None):
+        """
+        :param backend: "serial" or "sim"; defaults to the DXL_BACKEND environment variable
+        """
+        self.devicename = devicename or self.DEVICENAME
+        self.baudrate = baudrate or self.BAUDRATE
+
+        self.sdk = load_sdk(backend)
+        self.portHandler = self.sdk.PortHandler(self.devicename)
+        self.packetHandler = self.sdk.PacketHandler(self.PROTOCOL_VERSION)
+
+        self.lock = threading.RLock()
+        self._users = 0
+
+        # Per-packet latency, comm-result and error statistics
+        self.instrumentation = BusInstrumentation()
+
+        # Control-table shadow: {dxl_id: {address: byte}} of the last written values
+        self.use_shadow = True
+        self._shadow = {}
+        self.shadow_hits = {}
+        self.shadow_misses = {}
+        self._queues = {}
+        self._workers = {}
+
+    # ------------------ Port lifecycle ------------------
+
+    def open(self):
+        """
+        Open the port on first use. Later calls only add a user.
+        """
+        with self.lock:
+            if self._users == 0:
+                if not self.portHandler.openPort():
+                    print(f"Failed to open port {self.devicename}.")
+                    return False
+                if not self.portHandler.setBaudRate(self.baudrate):
+                    print("Failed to set baud rate.")
+                    self.portHandler.closePort()
+                    return False
+            self._users += 1
+            return True
+
+    def close(self):
+        """
+        Release one user. The port is closed when the last user releases it.
+        """
+        with self.lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users > 0:
+                return
+        self._stop_workers()
+        with self.lock:
+            self.portHandler.closePort()
+            self._shadow.clear()
+        print(f"Port {self.devicename} closed. {self.shadow_summary()}")
+
+    @property
+    def is_open(self):
+        return self._users > 0
+
+    def motor(self, dxl_id):
+        """
+        Lightweight handle bound to one motor ID on this bus.
+        """
+        return MotorHandle(self, dxl_id)
+
+    # ------------------ Single-motor packets ------------------
+
+    def write1(self, dxl_id, address, value):
+        with self.lock:
+            if self._shadow_matches(dxl_id, address, _to_bytes(value, 1)):
+                return self.sdk.COMM_SUCCESS, 0
+            start = time.perf_counter()
+            result, error = self.packetHandler.write1ByteTxRx(self.portHandler, dxl_id, address, value)
+            self.instrumentation.record("write1", dxl_id, address, time.perf_counter() - start, result, error)
+            self._shadow_store(dxl_id, address, _to_bytes(value, 1), result, error)
+            return result, error
+
+    def write4(self, dxl_id, address, value):
+        with self.lock:
+            if self._shadow_matches(dxl_id, address, _to_bytes(value, 4)):
+                return self.sdk.COMM_SUCCESS, 0
+            start = time.perf_counter()
+            result, error = self.packetHandler.write4ByteTxRx(self.portHandler, dxl_id, address, value)
+            self.instrumentation.record("write4", dxl_id, address, time.perf_counter() - start, result, error)
+            self._shadow_store(dxl_id, address, _to_bytes(value, 4), result, error)
+            return result, error
+
+    def read1(self, dxl_id, address):
+        with self.lock:
+            start = time.perf_counter()
+            value, result, error = self.packetHandler.read1ByteTxRx(self.portHandler, dxl_id, address)
+            self.instrumentation.record("read1", dxl_id, address, time.perf_counter() - start, result, error)
+            self._check_error(dxl_id, error)
+            return value, result, error
+
+    def read4(self, dxl_id, address):
+        with self.lock:
+            start = time.perf_counter()
+            value, result, error = self.packetHandler.read4ByteTxRx(self.portHandler, dxl_id, address)
+            self.instrumentation.record("read4", dxl_id, address, time.perf_counter() - start, result, error)
+            self._check_error(dxl_id, error)
+            return value, result, error
+
+    # ------------------ Group packets ------------------
+
+    def sync_write(self, start_address, data_length, params):
+        """
+        Write data_length bytes from start_address on several motors in one packet.
+        :param params: {dxl_id: list of bytes}
+        :return: comm result
+        """
+        with self.lock:
+            # Motors whose registers already hold these bytes are left out
+            params = {dxl_id: data for dxl_id, data in params.items()
+                      if not self._shadow_matches(dxl_id, start_address, data)}
+            if not params:
+                return self.sdk.COMM_SUCCESS
+            group = self.sdk.GroupSyncWrite(self.portHandler, self.packetHandler, start_address, data_length)
+            for dxl_id, data in params.items():
+                group.addParam(dxl_id, data)
+            start = time.perf_counter()
+            result = group.txPacket()
+            self.instrumentation.record("sync_write", None, start_address, time.perf_counter() - start, result)
+            for dxl_id, data in params.items():
+                self._shadow_store(dxl_id, start_address, data, result, 0)
+            return result
+
+    def sync_read(self, start_address, data_length, dxl_ids, fields):
+        """
+        Read a block of the control table from several motors in one packet.
+        :param fields: [(address, size), ...] to decode inside the block
+        :return: {dxl_id: tuple of field values} for motors that replied
+        """
+        with self.lock:
+            group = self.sdk.GroupSyncRead(self.portHandler, self.packetHandler, start_address, data_length)
+            for dxl_id in dxl_ids:
+                group.addParam(dxl_id)
+            start = time.perf_counter()
+            result = group.txRxPacket()
+            self.instrumentation.record("sync_read", None, start_address, time.perf_counter() - start, result)
+            if result != self.sdk.COMM_SUCCESS:
+                return {}
+            values = {}
+            for dxl_id in dxl_ids:
+                if group.isAvailable(dxl_id, start_address, data_length):
+                    values[dxl_id] = tuple(group.getData(dxl_id, address, size) for address, size in fields)
+            return values
+
+    def describe(self, comm_result):
+        return self.packetHandler.getTxRxResult(comm_result)
+
+    def packet_summary(self):
+        """
+        Text lines with latency histograms and failures per register and motor,
+        plus the shadow-cache hit rate.
+        """
+        return self.instrumentation.summary_lines(self.describe) + [self.shadow_summary()]
+
+    # ------------------ Control-table shadow ------------------
+
+    def _shadowed(self, address, length):
+        """
+        True if every byte of [address, address + length) belongs to a shadowed register.
+        """
+        covered = 0
+        for reg, size in self.SHADOWED_REGISTERS.items():
+            lo, hi = max(reg, address), min(reg + size, address + length)
+            if lo < hi:
+                if reg < address or reg + size > address + length:
+                    return False  # partial register write
+                covered += size
+        return covered == length
+
+    def _shadow_matches(self, dxl_id, address, data):
+        """
+        True if the write can be skipped. Counts a hit or a miss for shadowed writes.
+        """
+        if not self.use_shadow or not self._shadowed(address, len(data)):
+            return False
+        table = self._shadow.get(dxl_id, {})
+        if all(table.get(address + i) == b for i, b in enumerate(data)):
+            self.shadow_hits[dxl_id] = self.shadow_hits.get(dxl_id, 0) + 1
+            return True
+        self.shadow_misses[dxl_id] = self.shadow_misses.get(dxl_id, 0) + 1
+        return False
+
+    def _shadow_store(self, dxl_id, address, data, result, error):
+        """
+        Remember written bytes after a successful write; forget them otherwise.
+        """
+        if self._check_error(dxl_id, error):
+            return
+        table = self._shadow.setdefault(dxl_id, {})
+        ok = result == self.sdk.COMM_SUCCESS and error == 0
+        for i, b in enumerate(data):
+            if ok and self._shadowed(address, len(data)):
+                table[address + i] = b
+            else:
+                table.pop(address + i, None)
+        if address <= self.ADDR_TORQUE_ENABLE < address + len(data):
+            # Enabling torque resets Goal Position to Present Position
+            for i in range(4):
+                table.pop(self.ADDR_GOAL_POSITION + i, None)
+
+    def _check_error(self, dxl_id, error):
+        """
+        A reply with an error or hardware-alert bit means the motor may have
+        shut down and changed its registers: forget everything shadowed for it.
+        :return: True if the shadow was dropped
+        """
+        if not error:
+            return False
+        self._shadow.pop(dxl_id, None)
+        return True
+
+    def invalidate(self, dxl_id=None):
+        """
+        Forget shadowed values, e.g. after a motor reboot or hardware error.
+        """
+        with self.lock:
+            if dxl_id is None:
+                self._shadow.clear()
+            else:
+                self._shadow.pop(dxl_id, None)
+
+    def shadow_summary(self):
+        hits = sum(self.shadow_hits.values())
+        misses = sum(self.shadow_misses.values())
+        total = hits + misses
+        rate = 100.0 * hits / total if total else 0.0
+        return f"Shadow cache: {hits} skipped / {total} writes ({rate:.0f}%)"
+
+    # ------------------ Per-motor command queues ------------------
+
+    def submit(self, dxl_id, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) on the worker of motor dxl_id.
+        Commands for one motor run in submission order; commands for
+        different motors run concurrently, interleaved packet by packet.
+        :return: concurrent.futures.Future with the result of fn
+        """
+        future = Future()
+        with self.lock:
+            if dxl_id not in self._queues:
+                self._queues[dxl_id] = queue.Queue()
+                worker = threading.Thread(target=self._run_queue, args=(self._queues[dxl_id],),
+                                          name=f"dxl-{dxl_id}", daemon=True)
+                self._workers[dxl_id] = worker
+                worker.start()
+            self._queues[dxl_id].put((future, fn, args, kwargs))
+        return future
+
+    def _run_queue(self, commands):
+        while True:
+            item = commands.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _stop_workers(self):
+        with self.lock:
+            queues, workers = self._queues, self._workers
+            self._queues, self._workers = {}, {}
+        for commands in queues.values():
+            commands.put(None)
+        for worker in workers.values():
+            if worker is not threading.current_thread():
+                worker.join(timeout=5)
+
+
+def _to_bytes(value, length):
+    return list((int(value) & (2 ** (8 * length) - 1)).to_bytes(length, "little"))
+
+
+class MotorHandle:
+    """
+    Per-motor view of a DynamixelBus: the same packet calls with the ID bound.
+    """
+
+    def __init__(self, bus, dxl_id):
+        self.bus = bus
+        self.dxl_id = dxl_id
+
+    def write1(self, address, value):
+        return self.bus.write1(self.dxl_id, address, value)
+
+    def write4(self, address, value):
+        return self.bus.write4(self.dxl_id, address, value)
+
+    def read1(self, address):
+        return self.bus.read1(self.dxl_id, address)
+
+    def read4(self, address):
+        return self.bus.read4(self.dxl_id, address)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.bus.submit(self.dxl_id, fn, *args, **kwargs)
@@ -0,0 +1,296 @@
+import random
+import time
+
+from .bus import DynamixelBus
+from .scheduler import MotionScheduler
+
+
+class MotorConfig:
+    """
+    Calibration of one motor: its ID, the raw position of the centre and the
+    allowed centered range. Goals outside the range are clamped.
+    """
+
+    def __init__(self, dxl_id, mid_offset, min_position=-600, max_position=600, name=""):
+        self.dxl_id = dxl_id
+        self.mid_offset = mid_offset
+        self.min_position = min_position
+        self.max_position = max_position
+        self.name = name or f"DXL {dxl_id}"
+
+    def to_raw(self, pos):
+        """
+        Centered position -> raw goal position, clamped to the allowed range.
+        """
+        clamped = min(max(pos, self.min_position), self.max_position)
+        if clamped != pos:
+            print(f"[{self.name}] Position {pos} outside [{self.min_position}, {self.max_position}], using {clamped}")
+        return int(clamped) + self.mid_offset
+
+    def from_raw(self, raw):
+        """
+        Raw present position -> centered position.
+        """
+        return raw % 4096 - self.mid_offset
+
+    def __repr__(self):
+        return f"MotorConfig(dxl_id={self.dxl_id}, mid_offset={self.mid_offset}, name='{self.name}')"
+
+
+# Calibrated motors of the haptic rig
+MOTOR_H = MotorConfig(dxl_id=1, mid_offset=930, name="horizontal")
+MOTOR_D = MotorConfig(dxl_id=2, mid_offset=995, name="depth")
+
+
+class DynamixelController:
+    """
+    Controller for one or more motors on a DynamixelBus.
+
+    Single-motor controllers are what the PSE experiments use:
+    move_to_position(pos) or move_to_position([pos, 0]). Multi-motor
+    controllers (the games) pick the motor with dxl_id=... and can move
+    several motors at once with sync_move.
+    """
+
+    # Control table addresses
+    ADDR_TORQUE_ENABLE    = 64
+    ADDR_GOAL_POSITION    = 116
+    ADDR_PRESENT_POSITION = 132
+    ADDR_PROFILE_VELOCITY = 112
+    ADDR_MOVING           = 122
+
+    # Profile Velocity (112) and Goal Position (116) are contiguous, so one
+    # sync-write packet of 8 bytes per motor sets both.
+    LEN_VELOCITY_AND_GOAL = 8
+    # Moving (122) through Present Position (132..135)
+    LEN_MOTION_STATUS     = 14
+
+    # Torque settings
+    TORQUE_ENABLE = 1
+    TORQUE_DISABLE = 0
+
+    # Motion completion settings
+    WAIT_FOR_MOTION    = True   # poll the motor instead of sleeping a fixed delay
+    POSITION_TOLERANCE = 10     # raw units (~0.9 deg)
+    MOTION_TIMEOUT     = 3.0    # seconds
+    POLL_INTERVAL      = 0.005  # seconds
+    FIXED_MOVE_DELAY   = 1      # seconds, used when WAIT_FOR_MOTION is False
+
+    def __init__(self, motors, bus=None, speed=(100, 500)):
+        """
+        :param motors: MotorConfig or list of MotorConfig; the first one is the default motor
+        :param bus: Shared DynamixelBus; a private bus on the default port if None
+        :param speed: Profile velocity policy: an int for a fixed velocity, or
+                      (low, high) for a random velocity per stimulus
+        """
+        if isinstance(motors, MotorConfig):
+            motors = [motors]
+        self.motors = {m.dxl_id: m for m in motors}
+        self.DXL_IDS = list(self.motors)
+        self.DXL_ID = self.DXL_IDS[0]
+        self.MID_OFFSET = self.motors[self.DXL_ID].mid_offset
+
+        self.bus = bus if bus is not None else DynamixelBus()
+        self.speed = speed
+
+        self.last_goal = {}      # {dxl_id: raw goal last written}
+        self.scheduler = None    # MotionScheduler for out-and-back stimuli, see use_scheduler
+
+    def initialize(self):
+        """
+        Open port (once per bus) and enable torque.
+        """
+        if not self.bus.open():
+            return False
+        self._write_torque(self.TORQUE_ENABLE)
+        self.last_goal.clear()  # enabling torque resets the goal to the present position
+        print(f"Initialization successful for Dynamixel ID(s) {self.DXL_IDS}.")
+        return True
+
+    def close(self):
+        """
+        Disable torque and release the port (closed by the last user of the bus).
+        """
+        self._write_torque(self.TORQUE_DISABLE)
+        self.bus.close()
+        print(f"Motor(s) {self.DXL_IDS} turned off.")
+
+    def _write_torque(self, value):
+        if len(self.DXL_IDS) == 1:
+            self.bus.write1(self.DXL_ID, self.ADDR_TORQUE_ENABLE, value)
+        else:
+            self.bus.sync_write(self.ADDR_TORQUE_ENABLE, 1, {dxl_id: [value] for dxl_id in self.DXL_IDS})
+
+    def use_scheduler(self, acceleration=0, dwell=0.0):
+        """
+        Play two-leg stimuli ([pos, 0]) as precomputed timed plans instead of
+        write-and-poll per leg. See dxl_control.scheduler.
+        """
+        self.scheduler = MotionScheduler(self, acceleration=acceleration, dwell=dwell)
+        return self.scheduler
+
+    def next_speed(self):
+        """
+        Profile velocity for the next stimulus according to the speed policy.
+        """
+        if isinstance(self.speed, (tuple, list)):
+            return random.randint(*self.speed)
+        return self.speed
+
+    # ------------------ Reading ------------------
+
+    def read_status(self, dxl_ids=None):
+        """
+        Moving flag and raw present position in one GroupSyncRead.
+        :return: {dxl_id: (moving, present_position_raw)} for motors that replied
+        """
+        if dxl_ids is None:
+            dxl_ids = self.DXL_IDS
+        return self.bus.sync_read(self.ADDR_MOVING, self.LEN_MOTION_STATUS, dxl_ids,
+                                  [(self.ADDR_MOVING, 1), (self.ADDR_PRESENT_POSITION, 4)])
+
+    def read_current_position(self, dxl_id=None):
+        """
+        Read the current centered position. Multi-motor controllers return
+        {dxl_id: position} for all motors unless dxl_id is given.
+        """
+        if dxl_id is None and len(self.DXL_IDS) > 1:
+            positions = {i: self.motors[i].from_raw(raw) for i, (_, raw) in self.read_status().items()}
+            for i, pos in positions.items():
+                print(f"[{self.motors[i].name}] Current centered position: {pos}")
+            return positions
+
+        if dxl_id is None:
+            dxl_id = self.DXL_ID
+        raw, _, _ = self.bus.read4(dxl_id, self.ADDR_PRESENT_POSITION)
+        pos = self.motors[dxl_id].from_raw(raw)
+        print(f"[{self.motors[dxl_id].name}] Current centered position: {pos}")
+        return pos
+
+    # ------------------ Moving ------------------
+
+    def move_to_position(self, target_pos, dxl_id=None, speed=None):
+        """
+        Move one motor to a position, or through a sequence such as an
+        out-and-back stimulus [pos, 0]. All legs share one velocity, so the
+        repeated velocity write is skipped by the bus shadow cache.
+        speed overrides the speed policy (e.g. a velocity from a session plan).
+        Returns the total time in seconds the move(s) took.
+        """
+        if dxl_id is None:
+            dxl_id = self.DXL_ID
+        if speed is None:
+            speed = self.next_speed()
+        sequence = target_pos if isinstance(target_pos, (list, tuple)) else [target_pos]
+        if self.scheduler is not None and len(sequence) == 2:
+            return self.scheduler.play(sequence[0], sequence[1], dxl_id, speed)
+        return sum(self._move_single_position(dxl_id, pos, speed) for pos in sequence)
+
+    def _move_single_position(self, dxl_id, pos, speed):
+        motor = self.motors[dxl_id]
+        target_raw = motor.to_raw(pos)
+        self.bus.write4(dxl_id, self.ADDR_PROFILE_VELOCITY, speed)
+        self.bus.write4(dxl_id, self.ADDR_GOAL_POSITION, target_raw)
+        self.last_goal[dxl_id] = target_raw
+        print(f"[{motor.name}] Moving to position: {pos} with velocity {speed}")
+        return self._wait({dxl_id: target_raw})
+
+    def move_to_position_async(self, target_pos, dxl_id=None):
+        """
+        Queue a move on the motor's command queue and return immediately.
+        Returns a Future that resolves to the move time in seconds.
+        """
+        if dxl_id is None:
+            dxl_id = self.DXL_ID
+        return self.bus.submit(dxl_id, self.move_to_position, target_pos, dxl_id)
+
+    def sync_move(self, goals, speed=None, wait=True):
+        """
+        Send profile velocity and goal position for several motors in one
+        GroupSyncWrite, so every listed motor starts moving in the same instant.
+        :param goals: {dxl_id: centered position}, e.g. {1: 0, 2: 0}
+        :param speed: Profile velocity for all listed motors (speed policy if None)
+        :param wait: Block until all listed motors reach their goals
+        Returns the time in seconds until all motors arrived (0.0 if not waiting).
+        """
+        if speed is None:
+            speed = self.next_speed()
+        targets = {dxl_id: self.motors[dxl_id].to_raw(pos) for dxl_id, pos in goals.items()}
+        result = self.bus.sync_write(
+            self.ADDR_PROFILE_VELOCITY, self.LEN_VELOCITY_AND_GOAL,
+            {dxl_id: _to_bytes(speed) + _to_bytes(raw) for dxl_id, raw in targets.items()})
+        if result != self.bus.sdk.COMM_SUCCESS:
+            print(f"[SYNC] Move failed: {self.bus.describe(result)}")
+            return 0.0
+        self.last_goal.update(targets)
+        print(f"[SYNC] Moving {goals} with velocity {speed}")
+        return self._wait(targets) if wait else 0.0
+
+    def _wait(self, targets):
+        if not self.WAIT_FOR_MOTION:
+            time.sleep(self.FIXED_MOVE_DELAY)
+            return self.FIXED_MOVE_DELAY
+        reached, elapsed = self.wait_for_motion(targets)
+        if reached:
+            print(f"Reached {list(targets)} in {elapsed * 1000:.0f} ms")
+        else:
+            print(f"Timed out after {elapsed * 1000:.0f} ms moving {list(targets)}")
+        return elapsed
+
+    def wait_for_motion(self, targets):
+        """
+        Poll Moving and Present Position (one GroupSyncRead per cycle) until every
+        motor in targets is idle within POSITION_TOLERANCE, or MOTION_TIMEOUT expires.
+        :param targets: {dxl_id: goal position raw}
+        Returns (reached, elapsed_seconds).
+        """
+        start = time.perf_counter()
+        deadline = start + self.MOTION_TIMEOUT
+        dxl_ids = list(targets)
+        while True:
+            status = self.read_status(dxl_ids)
+            arrived = True
+            for dxl_id, target_raw in targets.items():
+                if dxl_id not in status:
+                    arrived = False
+                    break
+                moving, position = status[dxl_id]
+                error = (position - target_raw) % 4096
+                if moving or min(error, 4096 - error) > self.POSITION_TOLERANCE:
+                    arrived = False
+                    break
+            now = time.perf_counter()
+            if arrived:
+                return True, now - start
+            if now >= deadline:
+                return False, now - start
+            time.sleep(self.POLL_INTERVAL)
+
+
+# ---------------- Controllers sharing one bus ----------------
+
+def sync_move_to_position(controllers, positions, speed=None, wait=True):
+    """
+    Move the default motor of each controller in one GroupSyncWrite, so
+    several axes start in the same instant. The controllers must share a bus.
+    Returns the time in seconds until all motors arrived (0.0 if not waiting).
+    """
+    group = DynamixelController([c.motors[c.DXL_ID] for c in controllers], bus=controllers[0].bus,
+                                speed=controllers[0].speed)
+    return group.sync_move({c.DXL_ID: pos for c, pos in zip(controllers, positions)}, speed=speed, wait=wait)
+
+
+def sync_read_positions(controllers):
+    """
+    Read the centered position of each controller's default motor in one GroupSyncRead.
+    Returns {dxl_id: centered position}.
+    """
+    group = DynamixelController([c.motors[c.DXL_ID] for c in controllers], bus=controllers[0].bus)
+    return {dxl_id: group.motors[dxl_id].from_raw(raw) for dxl_id, (_, raw) in group.read_status().items()}
+
+
+def _to_bytes(value, length=4):
+    """
+    Little-endian byte list for a sync-write parameter.
+    """
+    return list((int(value) & (2 ** (8 * length) - 1)).to_bytes(length, "little"))
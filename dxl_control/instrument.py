@@ -0,0 +1,111 @@
+import bisect
+import threading
+
+# Histogram bin upper edges in milliseconds; the last bin is open-ended
+LATENCY_BINS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100)
+
+REGISTER_NAMES = {
+    64: "TorqueEnable",
+    108: "ProfileAcceleration",
+    112: "ProfileVelocity",
+    116: "GoalPosition",
+    122: "Moving",
+    126: "PresentCurrent",
+    128: "PresentVelocity",
+    132: "PresentPosition",
+}
+
+
+class PacketStats:
+    """
+    Latency histogram and result counts for one kind of packet
+    (operation × register × motor ID).
+    """
+
+    __slots__ = ("count", "total", "max", "bins", "results", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bins = [0] * (len(LATENCY_BINS_MS) + 1)
+        self.results = {}   # comm result -> count, failures only
+        self.errors = {}    # device error byte -> count, non-zero only
+
+    def add(self, latency_ms, result, error):
+        self.count += 1
+        self.total += latency_ms
+        if latency_ms > self.max:
+            self.max = latency_ms
+        self.bins[bisect.bisect_left(LATENCY_BINS_MS, latency_ms)] += 1
+        if result != 0:
+            self.results[result] = self.results.get(result, 0) + 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def percentile(self, q):
+        """
+        Upper bin edge below which a fraction q of the packets fall.
+        """
+        target = q * self.count
+        seen = 0
+        for edge, n in zip(LATENCY_BINS_MS + (float("inf"),), self.bins):
+            seen += n
+            if seen >= target:
+                return edge
+        return float("inf")
+
+
+class BusInstrumentation:
+    """
+    Collects PacketStats for every transaction on a DynamixelBus.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, op, dxl_id, address, seconds, result, error=0):
+        """
+        :param dxl_id: Motor ID, or None for group packets
+        """
+        key = (op, address, dxl_id)
+        with self._lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = PacketStats()
+            entry.add(seconds * 1000.0, result, error)
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def summary_lines(self, describe=str):
+        """
+        One line per (operation, register, motor) plus a total line.
+        :param describe: Turns a comm result code into text
+        """
+        lines = []
+        total_count = 0
+        total_time = 0.0
+        total_failed = 0
+        header = "  ".join(f"<{edge:g}" for edge in LATENCY_BINS_MS) + f"  >={LATENCY_BINS_MS[-1]:g}"
+        lines.append(f"Latency histogram bins (ms): {header}")
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda kv: (kv[0][0], kv[0][1], kv[0][2] or 0))
+            for (op, address, dxl_id), s in items:
+                register = REGISTER_NAMES.get(address, str(address))
+                target = "group" if dxl_id is None else f"ID {dxl_id}"
+                failed = sum(s.results.values())
+                line = (f"{op} {register} {target}: n={s.count} mean={s.total / s.count:.3f}ms "
+                        f"p95<={s.percentile(0.95):g}ms max={s.max:.3f}ms bins={s.bins}")
+                if failed:
+                    line += " failed=" + ", ".join(f"{describe(r)} x{n}" for r, n in s.results.items())
+                if s.errors:
+                    line += " device_errors=" + ", ".join(f"{e} x{n}" for e, n in s.errors.items())
+                lines.append(line)
+                total_count += s.count
+                total_time += s.total
+                total_failed += failed
+        lines.append(f"Total: {total_count} packets, {total_time / 1000.0:.2f} s on the bus, {total_failed} failed")
+        return lines
@@ -0,0 +1,78 @@
+import math
+
+# Dynamixel X-series units (Protocol 2.0 control table)
+PULSES_PER_REV = 4096
+VELOCITY_UNIT_RPM = 0.229          # Profile Velocity (112) / Present Velocity (128)
+ACCELERATION_UNIT_RPM2 = 214.577   # Profile Acceleration (108)
+
+# Profile Velocity 0 means "no limit"; the motor then runs at its velocity limit.
+VELOCITY_LIMIT = 1023
+
+
+def velocity_to_pulses(profile_velocity):
+    """
+    Convert a Profile Velocity register value to pulses per second.
+    """
+    if profile_velocity <= 0:
+        profile_velocity = VELOCITY_LIMIT
+    return profile_velocity * VELOCITY_UNIT_RPM * PULSES_PER_REV / 60.0
+
+
+def acceleration_to_pulses(profile_acceleration):
+    """
+    Convert a Profile Acceleration register value to pulses per second².
+    0 means infinite acceleration (rectangular velocity profile).
+    """
+    return profile_acceleration * ACCELERATION_UNIT_RPM2 * PULSES_PER_REV / 3600.0
+
+
+def profile_duration(distance, profile_velocity, profile_acceleration=0):
+    """
+    Time in seconds the motor needs to travel distance pulses with the given
+    Profile Velocity / Profile Acceleration register values.
+
+    Matches the e-Manual velocity-based profile: rectangular if acceleration is 0,
+    trapezoidal if the motor reaches profile velocity, triangular otherwise.
+    """
+    distance = abs(distance)
+    if distance == 0:
+        return 0.0
+    v = velocity_to_pulses(profile_velocity)
+    a = acceleration_to_pulses(profile_acceleration)
+    if a <= 0:
+        return distance / v
+    t_acc = v / a
+    if distance >= v * t_acc:
+        return distance / v + t_acc
+    return 2.0 * math.sqrt(distance / a)
+
+
+def profile_state(distance, profile_velocity, profile_acceleration, t):
+    """
+    Travelled distance (pulses, signed like distance) and speed (pulses/s)
+    at t seconds after a goal was written.
+    """
+    sign = 1 if distance >= 0 else -1
+    distance = abs(distance)
+    if t <= 0 or distance == 0:
+        return 0.0, 0.0
+    v = velocity_to_pulses(profile_velocity)
+    a = acceleration_to_pulses(profile_acceleration)
+    total = profile_duration(distance, profile_velocity, profile_acceleration)
+    if t >= total:
+        return sign * float(distance), 0.0
+
+    if a <= 0:
+        return sign * v * t, v
+
+    t_acc = v / a
+    if distance < v * t_acc:
+        # Triangular: accelerate to the midpoint, then decelerate
+        t_acc = total / 2.0
+        v = a * t_acc
+    if t < t_acc:
+        return sign * 0.5 * a * t * t, a * t
+    if t < total - t_acc:
+        return sign * (0.5 * a * t_acc * t_acc + v * (t - t_acc)), v
+    remaining = total - t
+    return sign * (distance - 0.5 * a * remaining * remaining), a * remaining
@@ -0,0 +1,146 @@
+import time
+
+from .profile import profile_duration
+
+
+class StimulusPlan:
+    """
+    A compiled out-and-back stimulus: what to write, and when, relative to onset.
+    """
+
+    def __init__(self, dxl_id, start_raw, out_raw, return_raw, velocity, acceleration, dwell):
+        self.dxl_id = dxl_id
+        self.start_raw = start_raw
+        self.out_raw = out_raw
+        self.return_raw = return_raw
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.dwell = dwell
+
+        self.out_duration = profile_duration(out_raw - start_raw, velocity, acceleration)
+        self.return_duration = profile_duration(return_raw - out_raw, velocity, acceleration)
+        # Deadlines in seconds after onset
+        self.return_time = self.out_duration + dwell
+        self.end_time = self.return_time + self.return_duration
+
+    def __repr__(self):
+        return (f"StimulusPlan(id={self.dxl_id}, {self.start_raw}->{self.out_raw}->{self.return_raw}, "
+                f"v={self.velocity}, a={self.acceleration}, end={self.end_time * 1000:.0f} ms)")
+
+
+class MotionScheduler:
+    """
+    Plays out-and-back stimuli as precomputed, deadline-driven plans.
+
+    Profile Acceleration (108), Profile Velocity (112) and Goal Position (116)
+    are contiguous, so the out leg is a single 12-byte write that also pins
+    the motion profile, which makes the leg duration known in advance. At the
+    return deadline one status read confirms the out position was reached (a
+    motor slowed by contact or load is waited for, so the amplitude is never
+    cut short), then one Goal Position write starts the return leg and one
+    status read at the end confirms arrival. Four packets per stimulus
+    instead of a write/poll loop per leg.
+    """
+
+    ADDR_PROFILE_ACCELERATION = 108
+    LEN_PROFILE_AND_GOAL      = 12
+
+    SPIN_THRESHOLD = 0.002  # seconds before a deadline to stop sleeping and spin
+    SETTLE_MARGIN  = 0.010  # extra time allowed for the motor to settle on each leg
+
+    def __init__(self, controller, acceleration=0, dwell=0.0):
+        """
+        :param controller: DynamixelController whose motors the plans run on
+        :param acceleration: Profile Acceleration register value (0 = rectangular profile)
+        :param dwell: Seconds to hold the out position before returning
+        """
+        self.controller = controller
+        self.acceleration = acceleration
+        self.dwell = dwell
+        self.lateness = []  # seconds each deadline-driven packet was issued after its deadline
+        self.out_delays = []  # per stimulus: seconds waited for a late out leg (0.0 if on time)
+
+    def compile(self, out_pos, return_pos=0, dxl_id=None, speed=None):
+        """
+        Turn a [out_pos, return_pos] stimulus into a StimulusPlan.
+        """
+        c = self.controller
+        dxl_id = c.DXL_ID if dxl_id is None else dxl_id
+        motor = c.motors[dxl_id]
+        start_raw = c.last_goal.get(dxl_id)
+        if start_raw is None:
+            raw, _, _ = c.bus.read4(dxl_id, c.ADDR_PRESENT_POSITION)
+            start_raw = raw % 4096
+        velocity = speed if speed is not None else c.next_speed()
+        return StimulusPlan(dxl_id, start_raw, motor.to_raw(out_pos), motor.to_raw(return_pos),
+                            velocity, self.acceleration, self.dwell + self.SETTLE_MARGIN)
+
+    def execute(self, plan):
+        """
+        Run a plan. Returns the time in seconds from onset until the motor is back.
+        """
+        c = self.controller
+        onset = time.perf_counter()
+        c.bus.sync_write(self.ADDR_PROFILE_ACCELERATION, self.LEN_PROFILE_AND_GOAL,
+                         {plan.dxl_id: _to_bytes(plan.acceleration) + _to_bytes(plan.velocity) + _to_bytes(plan.out_raw)})
+        c.last_goal[plan.dxl_id] = plan.out_raw
+
+        self._sleep_until(onset + plan.return_time)
+        self.lateness.append(time.perf_counter() - (onset + plan.return_time))
+        delay = 0.0
+        moving, position = c.read_status([plan.dxl_id]).get(plan.dxl_id, (1, None))
+        if position is None or _distance(position, plan.out_raw) > c.POSITION_TOLERANCE:
+            # Out leg not finished (skin contact, load): wait for it and hold the dwell, then return
+            reached, delay = c.wait_for_motion({plan.dxl_id: plan.out_raw})
+            print(f"[{c.motors[plan.dxl_id].name}] Out leg {delay * 1000:.0f} ms late"
+                  f"{'' if reached else ', timed out short of the target'}")
+            self._sleep_until(time.perf_counter() + self.dwell)
+            delay += self.dwell
+        self.out_delays.append(delay)
+        c.bus.write4(plan.dxl_id, c.ADDR_GOAL_POSITION, plan.return_raw)
+        c.last_goal[plan.dxl_id] = plan.return_raw
+
+        self._sleep_until(onset + delay + plan.end_time + self.SETTLE_MARGIN)
+        moving, position = c.read_status([plan.dxl_id]).get(plan.dxl_id, (1, None))
+        if moving or position is None or _distance(position, plan.return_raw) > c.POSITION_TOLERANCE:
+            # Motor slower than planned (load, bus error): fall back to polling
+            c.wait_for_motion({plan.dxl_id: plan.return_raw})
+        elapsed = time.perf_counter() - onset
+        print(f"[{c.motors[plan.dxl_id].name}] Stimulus {c.motors[plan.dxl_id].from_raw(plan.out_raw)} "
+              f"played in {elapsed * 1000:.0f} ms (planned {plan.end_time * 1000:.0f} ms)")
+        return elapsed
+
+    def play(self, out_pos, return_pos=0, dxl_id=None, speed=None):
+        return self.execute(self.compile(out_pos, return_pos, dxl_id, speed))
+
+    def _sleep_until(self, deadline):
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            if remaining > self.SPIN_THRESHOLD:
+                time.sleep(remaining - self.SPIN_THRESHOLD)
+
+    def jitter_summary(self):
+        """
+        Lateness of deadline-driven packets: count, mean, 95th percentile, max (ms),
+        and how many out legs had to be waited for.
+        """
+        if not self.lateness:
+            return "Stimulus timing: no scheduled packets"
+        ordered = sorted(self.lateness)
+        mean = sum(ordered) / len(ordered)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        late = [d for d in self.out_delays if d > 0]
+        return (f"Stimulus timing: {len(ordered)} deadlines, lateness mean {mean * 1000:.3f} ms, "
+                f"p95 {p95 * 1000:.3f} ms, max {ordered[-1] * 1000:.3f} ms; "
+                f"{len(late)} out legs late (max {max(late, default=0.0) * 1000:.0f} ms)")
+
+
+def _distance(raw_a, raw_b):
+    error = (raw_a - raw_b) % 4096
+    return min(error, 4096 - error)
+
+
+def _to_bytes(value, length=4):
+    return list((int(value) & (2 ** (8 * length) - 1)).to_bytes(length, "little"))
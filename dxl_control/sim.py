@@ -0,0 +1,445 @@
+"""
+Software Dynamixel Protocol 2.0 simulator.
+
+The classes here mirror the parts of dynamixel_sdk that the controllers use
+(PortHandler, PacketHandler, GroupSyncWrite, GroupSyncRead), so selecting the
+"sim" backend in dxl_control.backend runs every experiment and game without a
+servo attached. Each simulated motor keeps a control table, follows the
+velocity/acceleration-limited profile from dxl_control.profile, and every
+packet pays a configurable bus latency and may fail at a configurable rate.
+
+Run ``python -m dxl_control.sim`` from the repository root for a throughput
+benchmark.
+"""
+import random
+import threading
+import time
+
+from .profile import profile_duration, profile_state, velocity_to_pulses
+
+# Communication results, same values as dynamixel_sdk
+COMM_SUCCESS = 0
+COMM_PORT_BUSY = -1000
+COMM_TX_FAIL = -1001
+COMM_RX_FAIL = -1002
+COMM_TX_ERROR = -2000
+COMM_RX_WAITING = -3000
+COMM_RX_TIMEOUT = -3001
+COMM_RX_CORRUPT = -3002
+COMM_NOT_AVAILABLE = -9000
+
+_COMM_TEXT = {
+    COMM_SUCCESS: "[TxRxResult] Communication success!",
+    COMM_PORT_BUSY: "[TxRxResult] Port is in use!",
+    COMM_TX_FAIL: "[TxRxResult] Failed transmit instruction packet!",
+    COMM_RX_FAIL: "[TxRxResult] Failed get status packet from device!",
+    COMM_TX_ERROR: "[TxRxResult] Incorrect instruction packet!",
+    COMM_RX_WAITING: "[TxRxResult] Now receiving status packet!",
+    COMM_RX_TIMEOUT: "[TxRxResult] There is no status packet!",
+    COMM_RX_CORRUPT: "[TxRxResult] Incorrect status packet!",
+    COMM_NOT_AVAILABLE: "[TxRxResult] Protocol does not support this function!",
+}
+
+# Control table addresses modelled by the simulator
+ADDR_TORQUE_ENABLE = 64
+ADDR_PROFILE_ACCELERATION = 108
+ADDR_PROFILE_VELOCITY = 112
+ADDR_GOAL_POSITION = 116
+ADDR_MOVING = 122
+ADDR_MOVING_STATUS = 123
+ADDR_PRESENT_PWM = 124
+ADDR_PRESENT_CURRENT = 126
+ADDR_PRESENT_VELOCITY = 128
+ADDR_PRESENT_POSITION = 132
+
+CONTROL_TABLE_SIZE = 147
+MODEL_NUMBER = 1020  # XM430-W350
+
+# Rough current draw while the profile is running, in 2.69 mA units
+MOVING_CURRENT = 40
+
+
+class SimMotor:
+    """
+    One simulated servo: a RAM control table plus a motion profile.
+    """
+
+    def __init__(self, dxl_id, position=2048, clock=time.perf_counter, instant=False):
+        self.dxl_id = dxl_id
+        self.clock = clock
+        self.instant = instant  # jump to the goal immediately (dry run)
+        self.table = bytearray(CONTROL_TABLE_SIZE)
+
+        self._start_position = position
+        self._distance = 0
+        self._start_time = clock()
+        self._write(ADDR_GOAL_POSITION, 4, position)
+        self._write(ADDR_PRESENT_POSITION, 4, position)
+
+    def _write(self, address, length, value):
+        self.table[address:address + length] = (int(value) & (2 ** (8 * length) - 1)).to_bytes(length, "little")
+
+    def _read(self, address, length):
+        return int.from_bytes(self.table[address:address + length], "little")
+
+    def _update(self):
+        """
+        Refresh the present-state registers for the current time.
+        """
+        velocity = self._read(ADDR_PROFILE_VELOCITY, 4)
+        acceleration = self._read(ADDR_PROFILE_ACCELERATION, 4)
+        elapsed = float("inf") if self.instant else self.clock() - self._start_time
+        travelled, speed = profile_state(self._distance, velocity, acceleration, elapsed)
+        moving = abs(travelled) < abs(self._distance)
+
+        self._write(ADDR_PRESENT_POSITION, 4, round(self._start_position + travelled))
+        direction = 1 if self._distance >= 0 else -1
+        self._write(ADDR_PRESENT_VELOCITY, 4, round(direction * speed / velocity_to_pulses(1)))
+        self._write(ADDR_PRESENT_CURRENT, 2, direction * MOVING_CURRENT if moving else 0)
+        self._write(ADDR_MOVING, 1, int(moving))
+        self._write(ADDR_MOVING_STATUS, 1, 0 if moving else 1)
+
+    def read(self, address, length):
+        """
+        Read length bytes of the control table as a list of ints.
+        """
+        self._update()
+        return list(self.table[address:address + length])
+
+    def write(self, address, data):
+        """
+        Write raw bytes to the control table, starting motion on a goal write.
+        """
+        self._update()
+        goal_written = address <= ADDR_GOAL_POSITION < address + len(data)
+        self.table[address:address + len(data)] = bytes(data)
+        if goal_written and self._read(ADDR_TORQUE_ENABLE, 1):
+            present = self._read(ADDR_PRESENT_POSITION, 4)
+            goal = self._read(ADDR_GOAL_POSITION, 4)
+            self._start_position = _signed(present, 4)
+            self._distance = _signed(goal, 4) - self._start_position
+            self._start_time = self.clock()
+
+    def move_duration(self):
+        """
+        Total duration of the current profile, in seconds.
+        """
+        return profile_duration(self._distance, self._read(ADDR_PROFILE_VELOCITY, 4),
+                                self._read(ADDR_PROFILE_ACCELERATION, 4))
+
+
+class SimNetwork:
+    """
+    The motors wired to one simulated serial port, plus its bus characteristics.
+    """
+
+    def __init__(self, dxl_ids=(1, 2), latency=0.0005, error_rate=0.0, seed=None, instant=False, verbose=False):
+        self.motors = {dxl_id: SimMotor(dxl_id, instant=instant) for dxl_id in dxl_ids}
+        self.latency = latency          # seconds per packet, on top of the wire time
+        self.error_rate = error_rate    # probability that a packet gets no reply
+        self.verbose = verbose          # print every write
+        self.baudrate = 1000000
+        self.lock = threading.Lock()
+        self.packets = 0
+        self._random = random.Random(seed)
+
+    def transfer(self, n_bytes):
+        """
+        Spend the time one packet takes and decide whether it got through.
+        """
+        self.packets += 1
+        delay = self.latency + n_bytes * 10.0 / self.baudrate
+        if delay > 0:
+            time.sleep(delay)
+        return self._random.random() >= self.error_rate
+
+
+_networks = {}
+
+
+def get_network(devicename, **defaults):
+    """
+    The simulated network behind a port name, created on first use.
+    """
+    if devicename not in _networks:
+        _networks[devicename] = SimNetwork(**defaults)
+    return _networks[devicename]
+
+
+def configure(devicename="COM3", **kwargs):
+    """
+    Replace the network behind a port, e.g. configure("COM3", latency=0.001, error_rate=0.01).
+    """
+    _networks[devicename] = SimNetwork(**kwargs)
+    return _networks[devicename]
+
+
+def _signed(value, length):
+    bits = 8 * length
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+# ---------------- dynamixel_sdk-compatible classes ----------------
+
+class PortHandler:
+
+    def __init__(self, port_name):
+        self.port_name = port_name
+        self.network = get_network(port_name)
+        self.is_open = False
+        self.baudrate = self.network.baudrate
+
+    def openPort(self):
+        self.is_open = True
+        return True
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        pass
+
+    def setBaudRate(self, baudrate):
+        self.baudrate = baudrate
+        self.network.baudrate = baudrate
+        return True
+
+    def getBaudRate(self):
+        return self.baudrate
+
+    def getPortName(self):
+        return self.port_name
+
+
+class PacketHandler:
+
+    # Instruction (10) + status (11) packet overhead in bytes
+    OVERHEAD = 21
+
+    def __init__(self, protocol_version=2.0):
+        self.protocol_version = protocol_version
+
+    def getProtocolVersion(self):
+        return self.protocol_version
+
+    def getTxRxResult(self, result):
+        return _COMM_TEXT.get(result, "[TxRxResult] Unknown result")
+
+    def getRxPacketError(self, error):
+        return "" if error == 0 else f"[RxPacketError] Error code {error}"
+
+    def _txrx(self, port, dxl_id, n_bytes):
+        network = port.network
+        if not port.is_open:
+            return None, COMM_PORT_BUSY
+        with network.lock:
+            delivered = network.transfer(self.OVERHEAD + n_bytes)
+        motor = network.motors.get(dxl_id)
+        if not delivered or motor is None:
+            return None, COMM_RX_TIMEOUT
+        return motor, COMM_SUCCESS
+
+    def ping(self, port, dxl_id):
+        motor, result = self._txrx(port, dxl_id, 3)
+        return (MODEL_NUMBER if motor else 0), result, 0
+
+    def readTxRx(self, port, dxl_id, address, length):
+        motor, result = self._txrx(port, dxl_id, length)
+        if motor is None:
+            return [], result, 0
+        return motor.read(address, length), result, 0
+
+    def writeTxRx(self, port, dxl_id, address, length, data):
+        motor, result = self._txrx(port, dxl_id, length)
+        if motor is None:
+            return result, 0
+        motor.write(address, data[:length])
+        if port.network.verbose:
+            print(f"[DRY] ID {dxl_id} write @{address}: {int.from_bytes(bytes(data[:length]), 'little')}")
+        return result, 0
+
+    def _read_value(self, port, dxl_id, address, length):
+        data, result, error = self.readTxRx(port, dxl_id, address, length)
+        value = int.from_bytes(bytes(data), "little") if data else 0
+        return value, result, error
+
+    def _write_value(self, port, dxl_id, address, length, value):
+        data = list((int(value) & (2 ** (8 * length) - 1)).to_bytes(length, "little"))
+        return self.writeTxRx(port, dxl_id, address, length, data)
+
+    def read1ByteTxRx(self, port, dxl_id, address):
+        return self._read_value(port, dxl_id, address, 1)
+
+    def read2ByteTxRx(self, port, dxl_id, address):
+        return self._read_value(port, dxl_id, address, 2)
+
+    def read4ByteTxRx(self, port, dxl_id, address):
+        return self._read_value(port, dxl_id, address, 4)
+
+    def write1ByteTxRx(self, port, dxl_id, address, value):
+        return self._write_value(port, dxl_id, address, 1, value)
+
+    def write2ByteTxRx(self, port, dxl_id, address, value):
+        return self._write_value(port, dxl_id, address, 2, value)
+
+    def write4ByteTxRx(self, port, dxl_id, address, value):
+        return self._write_value(port, dxl_id, address, 4, value)
+
+
+class GroupSyncWrite:
+
+    def __init__(self, port, ph, start_address, data_length):
+        self.port = port
+        self.ph = ph
+        self.start_address = start_address
+        self.data_length = data_length
+        self.data_dict = {}
+
+    def addParam(self, dxl_id, data):
+        if dxl_id in self.data_dict or len(data) > self.data_length:
+            return False
+        self.data_dict[dxl_id] = list(data)
+        return True
+
+    def removeParam(self, dxl_id):
+        self.data_dict.pop(dxl_id, None)
+
+    def changeParam(self, dxl_id, data):
+        if dxl_id not in self.data_dict or len(data) > self.data_length:
+            return False
+        self.data_dict[dxl_id] = list(data)
+        return True
+
+    def clearParam(self):
+        self.data_dict.clear()
+
+    def txPacket(self):
+        if not self.data_dict:
+            return COMM_NOT_AVAILABLE
+        network = self.port.network
+        if not self.port.is_open:
+            return COMM_PORT_BUSY
+        # Sync write has no status packet: one instruction, no reply to lose
+        with network.lock:
+            network.transfer(10 + len(self.data_dict) * (1 + self.data_length))
+        for dxl_id, data in self.data_dict.items():
+            motor = network.motors.get(dxl_id)
+            if motor is not None:
+                motor.write(self.start_address, data)
+        if network.verbose:
+            print(f"[DRY] Sync write @{self.start_address}: {self.data_dict}")
+        return COMM_SUCCESS
+
+
+class GroupSyncRead:
+
+    def __init__(self, port, ph, start_address, data_length):
+        self.port = port
+        self.ph = ph
+        self.start_address = start_address
+        self.data_length = data_length
+        self.data_dict = {}
+
+    def addParam(self, dxl_id):
+        if dxl_id in self.data_dict:
+            return False
+        self.data_dict[dxl_id] = []
+        return True
+
+    def removeParam(self, dxl_id):
+        self.data_dict.pop(dxl_id, None)
+
+    def clearParam(self):
+        self.data_dict.clear()
+
+    def txPacket(self):
+        return COMM_SUCCESS if self.data_dict else COMM_NOT_AVAILABLE
+
+    def rxPacket(self):
+        return self.txRxPacket()
+
+    def txRxPacket(self):
+        if not self.data_dict:
+            return COMM_NOT_AVAILABLE
+        network = self.port.network
+        if not self.port.is_open:
+            return COMM_PORT_BUSY
+        result = COMM_SUCCESS
+        with network.lock:
+            delivered = network.transfer(
+                10 + len(self.data_dict) * (11 + self.data_length))
+        for dxl_id in self.data_dict:
+            motor = network.motors.get(dxl_id)
+            if delivered and motor is not None:
+                self.data_dict[dxl_id] = motor.read(self.start_address, self.data_length)
+            else:
+                self.data_dict[dxl_id] = []
+                result = COMM_RX_TIMEOUT
+        return result
+
+    def isAvailable(self, dxl_id, address, data_length):
+        data = self.data_dict.get(dxl_id)
+        if not data:
+            return False
+        return self.start_address <= address and address + data_length <= self.start_address + self.data_length
+
+    def getData(self, dxl_id, address, data_length):
+        if not self.isAvailable(dxl_id, address, data_length):
+            return 0
+        offset = address - self.start_address
+        return int.from_bytes(bytes(self.data_dict[dxl_id][offset:offset + data_length]), "little")
+
+
+class DryRunPortHandler(PortHandler):
+    """
+    Port for the "dryrun" backend: motors reach their goals instantly, packets
+    cost no time and every write is printed.
+    """
+
+    def __init__(self, port_name):
+        self.port_name = port_name
+        self.network = get_network(f"dryrun:{port_name}", latency=0.0, instant=True, verbose=True)
+        self.is_open = False
+        self.baudrate = self.network.baudrate
+
+
+# ---------------- Benchmark ----------------
+
+def benchmark(n_packets=2000, latency=0.0005, error_rate=0.0):
+    """
+    Print packet throughput of the simulated bus and the duration of one
+    out-and-back stimulus, for regression timing without hardware.
+    """
+    network = configure("SIM-BENCH", latency=latency, error_rate=error_rate, seed=0)
+    port = PortHandler("SIM-BENCH")
+    port.openPort()
+    ph = PacketHandler(2.0)
+
+    start = time.perf_counter()
+    for _ in range(n_packets):
+        ph.read4ByteTxRx(port, 1, ADDR_PRESENT_POSITION)
+    elapsed = time.perf_counter() - start
+    print(f"read4ByteTxRx:  {n_packets / elapsed:8.0f} packets/s ({elapsed / n_packets * 1e3:.3f} ms each)")
+
+    group = GroupSyncRead(port, ph, ADDR_MOVING, 14)
+    for dxl_id in network.motors:
+        group.addParam(dxl_id)
+    start = time.perf_counter()
+    for _ in range(n_packets):
+        group.txRxPacket()
+    elapsed = time.perf_counter() - start
+    print(f"GroupSyncRead:  {n_packets / elapsed:8.0f} packets/s for {len(network.motors)} motors")
+
+    ph.write1ByteTxRx(port, 1, ADDR_TORQUE_ENABLE, 1)
+    ph.write4ByteTxRx(port, 1, ADDR_PROFILE_VELOCITY, 300)
+    start = time.perf_counter()
+    for goal in (2048 + 400, 2048):
+        ph.write4ByteTxRx(port, 1, ADDR_GOAL_POSITION, goal)
+        while ph.read1ByteTxRx(port, 1, ADDR_MOVING)[0]:
+            time.sleep(0.001)
+    print(f"Stimulus 400 pulses out and back at velocity 300: {(time.perf_counter() - start) * 1e3:.1f} ms")
+    print(f"Packets sent: {network.packets}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+
+
+class TelemetrySampler:
+    """
+    Background sampler of present position, velocity and current for every motor.
+
+    One GroupSyncRead per sample reads Present Current (126) through Present
+    Position (132..135) of all motors. Samples go into a preallocated ring
+    buffer stamped with time.perf_counter, so trials can be cut out afterwards
+    by the same clock the UI uses.
+    """
+
+    ADDR_PRESENT_CURRENT  = 126
+    ADDR_PRESENT_VELOCITY = 128
+    ADDR_PRESENT_POSITION = 132
+    LEN_PRESENT_STATE     = 10
+
+    FIELDS = ("position", "velocity", "current")
+
+    def __init__(self, bus, dxl_ids, rate_hz=200, capacity_s=3600):
+        """
+        :param bus: DynamixelBus the motors are on
+        :param dxl_ids: Motor IDs to sample
+        :param rate_hz: Sampling rate
+        :param capacity_s: Seconds of history kept before the oldest samples are overwritten
+        """
+        self.bus = bus
+        self.dxl_ids = list(dxl_ids)
+        self.period = 1.0 / rate_hz
+        self.capacity = int(rate_hz * capacity_s)
+
+        self.times = np.zeros(self.capacity, dtype=np.float64)
+        # samples × motors × (position, velocity, current); NaN where a motor did not reply
+        self.data = np.full((self.capacity, len(self.dxl_ids), len(self.FIELDS)), np.nan, dtype=np.float32)
+        self.count = 0
+        self.overruns = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        print(f"[Telemetry] {self.count} samples, {self.overruns} overruns")
+
+    def _run(self):
+        fields = [(self.ADDR_PRESENT_POSITION, 4), (self.ADDR_PRESENT_VELOCITY, 4), (self.ADDR_PRESENT_CURRENT, 2)]
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            values = self.bus.sync_read(self.ADDR_PRESENT_CURRENT, self.LEN_PRESENT_STATE, self.dxl_ids, fields)
+            now = time.perf_counter()
+
+            row = np.full((len(self.dxl_ids), len(self.FIELDS)), np.nan, dtype=np.float32)
+            for j, dxl_id in enumerate(self.dxl_ids):
+                if dxl_id in values:
+                    position, velocity, current = values[dxl_id]
+                    row[j] = (_signed(position, 4), _signed(velocity, 4), _signed(current, 2))
+            with self._lock:
+                i = self.count % self.capacity
+                self.times[i] = now
+                self.data[i] = row
+                self.count += 1
+
+            next_time += self.period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (bus busy); skip ahead instead of bursting
+                self.overruns += 1
+                next_time = time.perf_counter()
+
+    def window(self, t_start, t_end):
+        """
+        Samples with t_start <= time < t_end, oldest first.
+        :return: (times, data) with data shaped samples × motors × FIELDS
+        """
+        with self._lock:
+            count = self.count
+            head = count % self.capacity
+            if count <= self.capacity:
+                segments = [(0, count)]
+            else:
+                segments = [(head, self.capacity), (0, head)]
+
+            times, data = [], []
+            for lo, hi in segments:
+                seg = self.times[lo:hi]
+                a = lo + np.searchsorted(seg, t_start, side="left")
+                b = lo + np.searchsorted(seg, t_end, side="left")
+                times.append(self.times[a:b].copy())
+                data.append(self.data[a:b].copy())
+        return np.concatenate(times), np.concatenate(data)
+
+    def save_trials(self, filename, windows, first_index=0):
+        """
+        Save one telemetry slice per trial to a compressed .npz file.
+        :param windows: [(t_start, t_end), ...] in time.perf_counter seconds
+        :param first_index: Trial number of the first window (for resumed sessions)
+        """
+        arrays = {
+            "dxl_ids": np.array(self.dxl_ids),
+            "fields": np.array(self.FIELDS),
+        }
+        for i, (t_start, t_end) in enumerate(windows, start=first_index):
+            times, data = self.window(t_start, t_end)
+            arrays[f"trial_{i}_t"] = times - t_start
+            arrays[f"trial_{i}_data"] = data
+        np.savez_compressed(filename, **arrays)
+        print(f"Telemetry saved to {filename}")
+
+
+def _signed(value, length):
+    bits = 8 * length
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
@@ -0,0 +1,75 @@
+import queue
+import threading
+
+
+class MotionWorker:
+    """
+    Runs motion commands on a background thread so a Tk mainloop never blocks.
+
+    Commands run one at a time in submission order. When a command finishes,
+    its callback is called on the Tk thread: completions are handed over
+    through a queue that is drained by a root.after poll, so the worker
+    thread never touches Tk itself.
+    """
+
+    POLL_MS = 5
+
+    def __init__(self, root):
+        self.root = root
+        self._commands = queue.Queue()
+        self._done = queue.Queue()
+        self._pending = 0
+        self._poll_id = None
+
+        self._thread = threading.Thread(target=self._run, name="motion-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        """
+        True while any submitted command has not yet reported completion.
+        """
+        return self._pending > 0
+
+    def submit(self, fn, *args, callback=None):
+        """
+        Queue fn(*args). callback(result) is called on the Tk thread afterwards;
+        result is None if fn raised.
+        """
+        self._pending += 1
+        self._commands.put((fn, args, callback))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
+
+    def stop(self):
+        """
+        Finish queued commands and stop the worker thread.
+        """
+        self._commands.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        while True:
+            item = self._commands.get()
+            if item is None:
+                return
+            fn, args, callback = item
+            try:
+                result = fn(*args)
+            except Exception as e:
+                print(f"[Motion] Command failed: {e}")
+                result = None
+            self._done.put((callback, result))
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                callback, result = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if callback is not None:
+                callback(result)
+        if self._pending > 0 and self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
@@ -0,0 +1,8 @@
+"""
+Trial selection and analysis code shared by the PSE experiments.
+
+Levels are expressed in steps of STEP_SIZE_MM relative to the standard
+(level 0 = the standard itself), so the same code serves every direction.
+Import from the submodules directly (e.g. ``from psychophysics.staircase
+import StaircaseTrials``).
+"""
@@ -0,0 +1,75 @@
+"""
+Response counting shared by the plot scripts (D_plot, D_plot_bias, H_plot).
+
+Works on the DataFrames of their load_and_parse_abs: one row per trial with
+mm1, mm2 (absolute mm) and resp_str, plus stage and, from load_sessions,
+participant and session.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def count_mixed_logic_abs(df, std_value=5.5, by=None):
+    """
+    For any trial where either mm1 or mm2 equals std_value (absolute),
+    exclude trials where both equal std_value.
+    Then:
+      - if test > std_value: count “correct” responses
+      - if test < std_value: count “incorrect” responses
+    i.e. count the trials on which the test was judged greater.
+    Returns:
+      test_values: sorted array of test stimulus levels
+      counts: 2×N array where
+        counts[0, i] = total trial count at test_values[i]
+        counts[1, i] = accumulated correct/incorrect count
+    With by (a column name or list of them, e.g. ["participant", "stage"])
+    every group is counted in the same pass and the result is
+    {group key: (test_values, counts)}.
+    """
+    mm1 = df['mm1'].to_numpy()
+    mm2 = df['mm2'].to_numpy()
+    resp = df['resp_str'].to_numpy()
+
+    std1 = mm1 == std_value
+    std2 = mm2 == std_value
+    keep = std1 ^ std2  # exactly one of the two is the standard
+
+    test = np.where(std1, mm2, mm1)[keep]
+    correct = (((resp == "First Greater") & (mm1 > mm2)) |
+               ((resp == "Second Greater") & (mm2 > mm1)))[keep]
+    judged_greater = np.where(test > std_value, correct, ~correct)
+
+    if by is None:
+        test_values, index = np.unique(test, return_inverse=True)
+        counts = np.vstack([np.bincount(index, minlength=len(test_values)),
+                            np.bincount(index, weights=judged_greater, minlength=len(test_values))]).astype(int)
+        return test_values, counts
+
+    keys = [by] if isinstance(by, str) else list(by)
+    table = df.loc[keep, keys].assign(test=test, judged_greater=judged_greater)
+    totals = table.groupby(keys + ['test'], sort=True, observed=True)['judged_greater'].agg(['size', 'sum'])
+    result = {}
+    for key, group in totals.groupby(level=keys, sort=False):
+        if isinstance(by, str) and isinstance(key, tuple):
+            key = key[0]
+        result[key] = (group.index.get_level_values('test').to_numpy(),
+                       np.vstack([group['size'].to_numpy(), group['sum'].to_numpy()]).astype(int))
+    return result
+
+
+def load_sessions(filenames, parse):
+    """
+    Parse several result files into one DataFrame with participant and session columns.
+    The participant is the file name up to the first underscore (Kevin_D.txt -> Kevin).
+    :param parse: load_and_parse_abs of D_plot or H_plot
+    """
+    frames = []
+    for filename in filenames:
+        session = os.path.splitext(os.path.basename(filename))[0]
+        df = parse(filename)
+        df.insert(0, 'participant', session.split('_')[0])
+        df.insert(1, 'session', session)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
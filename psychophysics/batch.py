@@ -0,0 +1,208 @@
+"""
+Batch analysis of every result file under one or more folders.
+
+Finds the sessions (trial files from psychophysics.results, or text
+reports for sessions recorded before them), counts the responses per stage
+and fits each session (psychophysics.fitting, maximum likelihood) on a
+process pool. Per-file results are cached by a
+hash of the file content, so a rerun only analyses new or changed
+sessions. The summary pools the sessions of each participant × stage and
+fits the pooled counts.
+
+    python -m psychophysics.batch [folder ...] [--out summary.csv] [--workers N]
+
+The participant is the file name up to the first underscore (Kevin_D.txt -> Kevin).
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from psychophysics.analysis import count_mixed_logic_abs
+from psychophysics.fitting import fit_conditions
+from psychophysics.results import load_report, load_trials, session_name
+
+# Part of every cache key: change it whenever analyse_file gives different results
+ANALYSIS_VERSION = 2
+STANDARD_MM = 5.5
+TRIAL_FILE_SUFFIXES = ("_trials.csv", "_trials.parquet")
+
+
+def fit_summary(fit):
+    """
+    The columns kept of a fit_conditions result; NaN where the fit did not converge.
+    """
+    if not fit["converged"]:
+        return {"pse": np.nan, "pse_se": np.nan, "slope": np.nan, "slope_se": np.nan}
+    return {"pse": fit["x0"], "pse_se": fit["x0_se"], "slope": fit["k"], "slope_se": fit["k_se"]}
+
+
+def find_result_files(roots):
+    """
+    Sessions under the given folders, one file each: the trial file where
+    there is one, otherwise the text report.
+    """
+    found = []
+    for root in roots:
+        for folder, _, names in os.walk(root):
+            names = set(names)
+            for name in sorted(names):
+                path = os.path.join(folder, name)
+                if name.endswith(TRIAL_FILE_SUFFIXES):
+                    found.append(path)
+                elif name.endswith(".txt"):
+                    base = name[:-len(".txt")]
+                    if not any(base + suffix in names for suffix in TRIAL_FILE_SUFFIXES):
+                        found.append(path)
+    return found
+
+
+def file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def analyse_file(filename, std_value=STANDARD_MM):
+    """
+    Count and fit every stage of one session. Runs in a worker process.
+    :return: {"trials": n, "stages": {stage: {"x", "n", "greater", "pse", "pse_se", "slope", "slope_se"}}},
+             JSON types only
+    """
+    if filename.endswith(TRIAL_FILE_SUFFIXES):
+        df = load_trials(filename)
+    else:
+        df = load_report(filename)
+    stages = {}
+    if len(df):
+        counted = count_mixed_logic_abs(df, std_value, by="stage")
+        for stage, fit in fit_conditions(counted).items():
+            x, counts = counted[stage]
+            stages[stage] = dict({"x": x.tolist(), "n": counts[0].tolist(), "greater": counts[1].tolist()},
+                                 **fit_summary(fit))
+    return {"trials": len(df), "stages": stages}
+
+
+class AnalysisCache:
+    """
+    analyse_file results on disk, keyed by content hash, analysis version and standard.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = {}
+        if filename and os.path.exists(filename):
+            with open(filename, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(digest, std_value):
+        return f"{digest}:{ANALYSIS_VERSION}:{std_value}"
+
+    def save(self):
+        if not self.filename:
+            return
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.filename)
+
+
+def analyse(roots, cache_file=None, workers=None, std_value=STANDARD_MM):
+    """
+    Analyse every session under roots, reusing cached results.
+    :param cache_file: JSON cache (none if None)
+    :return: list of {"file", "participant", "session", "trials", "stages"}, and how many files were analysed
+    """
+    files = find_result_files(roots)
+    cache = AnalysisCache(cache_file)
+    keys = {f: AnalysisCache.key(file_digest(f), std_value) for f in files}
+    todo = sorted({keys[f]: f for f in files if keys[f] not in cache.entries}.values())
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for f, result in zip(todo, pool.map(analyse_file, todo, [std_value] * len(todo))):
+                cache.entries[keys[f]] = result
+        cache.save()
+
+    sessions = []
+    for f in files:
+        session = session_name(f)
+        sessions.append(dict(cache.entries[keys[f]], file=f, session=session, participant=session.split("_")[0]))
+    return sessions, len(todo)
+
+
+def summarise(sessions):
+    """
+    Pool the counts of each participant × stage over their sessions and fit them, all in one batch.
+    :return: rows sorted by participant and stage
+    """
+    pooled = {}
+    for s in sessions:
+        for stage, st in s["stages"].items():
+            entry = pooled.setdefault((s["participant"], stage), {"sessions": 0, "counts": {}})
+            entry["sessions"] += 1
+            for x, n, greater in zip(st["x"], st["n"], st["greater"]):
+                total = entry["counts"].setdefault(x, [0, 0])
+                total[0] += n
+                total[1] += greater
+
+    counted = {}
+    for key, entry in sorted(pooled.items()):
+        x = np.array(sorted(entry["counts"]))
+        counted[key] = (x, np.array([entry["counts"][v] for v in x]).T)
+    rows = []
+    for (participant, stage), fit in fit_conditions(counted).items():
+        _, counts = counted[participant, stage]
+        rows.append(dict({"participant": participant, "stage": stage,
+                          "sessions": pooled[participant, stage]["sessions"], "trials": int(counts[0].sum())},
+                         **fit_summary(fit)))
+    return rows
+
+
+def print_table(rows):
+    print(f"{'participant':<14} {'stage':<10} {'sessions':>8} {'trials':>7} {'PSE (mm)':>9} {'± SE':>6} "
+          f"{'slope':>7} {'± SE':>6}")
+    for r in rows:
+        print(f"{r['participant']:<14} {r['stage']:<10} {r['sessions']:>8} {r['trials']:>7} "
+              f"{r['pse']:>9.3f} {r['pse_se']:>6.3f} {r['slope']:>7.3f} {r['slope_se']:>6.3f}")
+
+
+def write_csv(rows, filename):
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["participant", "stage"])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Summary saved to {filename}")
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    default_roots = [os.path.join(here, "..", "PSE_Experiment", name, "Results")
+                     for name in ("Combined", "Depth", "Horizontal")]
+    parser = argparse.ArgumentParser(description="Fit every session under the given folders.")
+    parser.add_argument("roots", nargs="*", help="Folders to search (default: the three experiments' Results)")
+    parser.add_argument("--out", help="Write the summary table to this CSV file")
+    parser.add_argument("--cache", help="Cache file (default: .analysis_cache.json in the first folder)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--std", type=float, default=STANDARD_MM, help="Standard stimulus in mm")
+    args = parser.parse_args()
+
+    roots = [root for root in (args.roots or default_roots) if os.path.isdir(root)]
+    if not roots:
+        parser.error("no result folders found")
+    cache_file = args.cache or os.path.join(roots[0], ".analysis_cache.json")
+    sessions, analysed = analyse(roots, cache_file, args.workers, args.std)
+    print(f"{len(sessions)} sessions, {analysed} analysed, {len(sessions) - analysed} from the cache")
+    rows = summarise(sessions)
+    print_table(rows)
+    if args.out:
+        write_csv(rows, args.out)
@@ -0,0 +1,127 @@
+"""
+Parametric bootstrap confidence intervals for the PSE and JND.
+
+The fitted logistic curve (psychophysics.fitting) is taken as the true
+observer: every resample redraws the "greater" count at each level from
+Binomial(n, P(x)), all resamples of all conditions as one array, and the
+whole array is refitted in a single batched solve. 10,000 resamples per
+condition take well under a second.
+
+    PSE = x0                       (50% point)
+    JND = ln(3) / k                (distance from the 50% to the 75% point)
+
+Intervals are percentile and BCa (bias-corrected and accelerated, with the
+acceleration from the trial-level jackknife). Resamples whose fit does not
+converge (completely separated responses) are left out and counted in
+"failed"; many failures mean too few trials per level for a stable slope.
+"""
+import numpy as np
+from scipy.stats import norm
+
+from psychophysics.fitting import fit_psychometric, logistic, stack_conditions
+
+JND_FACTOR = np.log(3.0)  # logit(0.75) - logit(0.5)
+
+
+def _statistics(fits):
+    # {"pse", "jnd"} arrays of a fit_psychometric result, NaN where it did not converge
+    ok = fits["converged"]
+    with np.errstate(divide="ignore"):
+        return {"pse": np.where(ok, fits["x0"], np.nan), "jnd": np.where(ok, JND_FACTOR / fits["k"], np.nan)}
+
+
+def _acceleration(x, n, r):
+    """
+    BCa acceleration of each condition from the jackknife over single trials.
+    Leaving out one trial at a level gives one of two data sets (a "greater"
+    trial or another one), so 2 × L fits per condition cover every trial,
+    weighed by how many trials they stand for.
+    :return: {"pse", "jnd"} arrays of shape (C,)
+    """
+    eye = np.eye(x.shape[-1])
+    # (C, 2L, L): rows 0..L-1 drop a "greater" trial, rows L..2L-1 another trial
+    n_jack = n[:, None, :] - np.concatenate([eye, eye])[None]
+    r_jack = r[:, None, :] - np.concatenate([eye, np.zeros_like(eye)])[None]
+    weights = np.concatenate([r, n - r], axis=1)
+    valid = weights > 0
+    n_jack = np.where(valid[..., None], n_jack, n[:, None, :])
+    r_jack = np.where(valid[..., None], r_jack, r[:, None, :])
+    jack = _statistics(fit_psychometric(np.broadcast_to(x[:, None, :], n_jack.shape), n_jack, r_jack))
+
+    acceleration = {}
+    for name, values in jack.items():
+        w = np.where(valid & np.isfinite(values), weights, 0.0)
+        values = np.where(w > 0, values, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d = (w * values).sum(-1, keepdims=True) / w.sum(-1, keepdims=True) - values
+            acceleration[name] = (w * d ** 3).sum(-1) / (6 * (w * d ** 2).sum(-1) ** 1.5)
+    return acceleration
+
+
+def _intervals(estimate, samples, acceleration, level):
+    # Percentile and BCa interval of one statistic of one condition
+    samples = samples[np.isfinite(samples)]
+    if not np.isfinite(estimate) or len(samples) < 2:
+        return (np.nan, np.nan), (np.nan, np.nan), np.nan
+    tails = np.array([(1 - level) / 2, (1 + level) / 2])
+    percentile = np.quantile(samples, tails)
+
+    below = (np.sum(samples < estimate) + 0.5 * np.sum(samples == estimate)) / len(samples)
+    z0 = norm.ppf(np.clip(below, 1 / len(samples), 1 - 1 / len(samples)))
+    a = acceleration if np.isfinite(acceleration) else 0.0
+    z = z0 + norm.ppf(tails)
+    bca = np.quantile(samples, norm.cdf(z0 + z / (1 - a * z)))
+    return tuple(percentile.tolist()), tuple(bca.tolist()), float(np.std(samples, ddof=1))
+
+
+def bootstrap_psychometric(x, n, greater, n_boot=10000, level=0.95, seed=None):
+    """
+    Parametric bootstrap of one condition or a batch of them.
+    :param x: Levels (mm), shape (C, L) or (L,); levels with n = 0 are ignored
+    :param n: Trials per level (whole numbers), same shape
+    :param greater: "Greater" responses per level, same shape
+    :param n_boot: Resamples per condition
+    :param level: Confidence level of the intervals
+    :param seed: Seed or numpy Generator
+    :return: list (one per condition) of dicts with pse, jnd, k, their bootstrap SE (pse_se,
+             jnd_se), percentile intervals (pse_ci, jnd_ci), BCa intervals (pse_bca, jnd_bca),
+             converged (of the fit to the data), n_boot and failed (resamples that did not converge)
+    """
+    x, n, r = np.broadcast_arrays(*(np.atleast_2d(np.asarray(v, dtype=float)) for v in (x, n, greater)))
+    rng = np.random.default_rng(seed)
+
+    fits = fit_psychometric(x, n, r)
+    estimates = _statistics(fits)
+    ok = fits["converged"][:, None]
+    p = logistic(x, np.where(ok, fits["x0"][:, None], 0.0), np.where(ok, fits["k"][:, None], 0.0))
+
+    # (C, B, L): every resample of every condition, fitted together
+    shape = (len(x), n_boot, x.shape[-1])
+    resampled = rng.binomial(n.astype(np.int64)[:, None, :], p[:, None, :], size=shape)
+    samples = _statistics(fit_psychometric(np.broadcast_to(x[:, None, :], shape), n[:, None, :], resampled))
+    acceleration = _acceleration(x, n, r)
+
+    results = []
+    for i in range(len(x)):
+        result = {"pse": float(estimates["pse"][i]), "jnd": float(estimates["jnd"][i]), "k": float(fits["k"][i])}
+        for name in ("pse", "jnd"):
+            ci, bca, se = _intervals(estimates[name][i], samples[name][i], acceleration[name][i], level)
+            result.update({f"{name}_se": se, f"{name}_ci": ci, f"{name}_bca": bca})
+        result.update({"converged": bool(fits["converged"][i]), "n_boot": n_boot,
+                       "failed": int(np.isnan(samples["pse"][i]).sum())})
+        results.append(result)
+    return results
+
+
+def bootstrap_conditions(conditions, **bootstrap_args):
+    """
+    Bootstrap many (test_values, counts) results of count_mixed_logic_abs in one batch.
+    :param conditions: list of (test_values, counts), or dict {key: (test_values, counts)}
+                       as count_mixed_logic_abs(..., by=...) returns
+    :return: list (or dict) of bootstrap_psychometric results per condition
+    """
+    keys, x, n, r = stack_conditions(conditions)
+    if not len(x):
+        return {} if keys is not None else []
+    results = bootstrap_psychometric(x, n, r, **bootstrap_args)
+    return dict(zip(keys, results)) if keys is not None else results
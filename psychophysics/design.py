@@ -0,0 +1,116 @@
+"""
+Monte Carlo evaluation of method-of-constant-stimuli designs.
+
+A design is (pair_count, step size in mm, number of levels): the
+get_trial_moves layout with pair_count trials per level, half with the
+standard first. Many simulated observers run each design; their responses
+are fitted by maximum likelihood (psychophysics.fitting, the fit of the
+plot scripts) in one batch per design, and the PSE estimates are
+summarised against the session length.
+
+    python -m psychophysics.design
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from psychophysics.fitting import fit_psychometric, logistic
+
+STANDARD_MM = 5.5
+SECONDS_PER_TRIAL = 1.5  # two stimuli, ISI and response; what headless sessions take per trial
+
+
+def design_levels(step_mm, level_count, standard=STANDARD_MM):
+    """
+    Comparison levels in mm, centred on the standard.
+    """
+    return standard + step_mm * (np.arange(level_count) - (level_count - 1) / 2)
+
+
+def simulate_rates(levels, pair_count, n_sims, rng, pse=STANDARD_MM, slope=4.0, bias=0.0, lapse=0.02):
+    """
+    Response rates P("comparison greater") for n_sims observers, all trials at once.
+
+    Half of the pair_count trials per level have the standard first; bias (mm)
+    is added to the second stimulus, as in headless.SimulatedObserver.
+    :return: n_sims × levels array of rates
+    """
+    half = pair_count // 2
+    d = levels - pse  # comparison relative to the point of subjective equality
+    # Standard first: comparison second gets +bias. Comparison first: standard second gets +bias.
+    p_std_first = lapse / 2 + (1 - lapse) * logistic(d + bias, 0.0, slope)
+    p_cmp_first = lapse / 2 + (1 - lapse) * logistic(d - bias, 0.0, slope)
+    greater = (rng.binomial(half, np.broadcast_to(p_std_first, (n_sims, len(levels))))
+               + rng.binomial(half, np.broadcast_to(p_cmp_first, (n_sims, len(levels)))))
+    return greater / (2 * half)
+
+
+def fit_pse(levels, rates, trials):
+    """
+    The plot scripts' fit, for every simulated observer at once.
+    :param rates: n_sims × levels rates from simulate_rates
+    :param trials: Trials per level behind each rate
+    :return: (x0, standard error of x0) arrays, NaN where the fit does not converge
+    """
+    fits = fit_psychometric(levels, trials, rates * trials)
+    ok = fits["converged"]
+    return np.where(ok, fits["x0"], np.nan), np.where(ok, fits["x0_se"], np.nan)
+
+
+def evaluate_design(design, n_sims=500, seed=None, pse=STANDARD_MM, slope=4.0, bias=0.0, lapse=0.02,
+                    seconds_per_trial=SECONDS_PER_TRIAL):
+    """
+    Simulate and fit one design. Runs in a worker process.
+    :param design: (pair_count, step_mm, level_count)
+    :return: dict with the design, trials, minutes and PSE bias / SD / CI widths
+    """
+    pair_count, step_mm, level_count = design
+    rng = np.random.default_rng(seed)
+    levels = design_levels(step_mm, level_count)
+    rates = simulate_rates(levels, pair_count, n_sims, rng, pse, slope, bias, lapse)
+    x0, se = fit_pse(levels, rates, 2 * (pair_count // 2))
+    ok = np.isfinite(x0)
+    trials = pair_count * level_count
+    return {
+        "pair_count": pair_count,
+        "step_mm": step_mm,
+        "levels": level_count,
+        "trials": trials,
+        "minutes": trials * seconds_per_trial / 60,
+        "bias": float(np.mean(x0[ok]) - pse) if ok.any() else np.nan,
+        "sd": float(np.std(x0[ok])) if ok.any() else np.nan,
+        # Spread of the estimates across observers, and the mean CI a single fit would report
+        "ci95_width": float(np.diff(np.percentile(x0[ok], [2.5, 97.5]))[0]) if ok.any() else np.nan,
+        "fit_ci95_width": float(np.nanmedian(2 * 1.96 * se[ok])) if ok.any() else np.nan,
+        "failed": int((~ok).sum()),
+    }
+
+
+def evaluate_designs(pair_counts=(2, 4, 6, 8), step_sizes=(0.1, 0.2, 0.3), level_counts=(5, 7, 9),
+                     n_sims=500, seed=0, workers=None, **observer):
+    """
+    Evaluate every combination on a process pool.
+    :param observer: pse, slope, bias, lapse of the simulated observers
+    :return: list of evaluate_design results, shortest session first
+    """
+    designs = list(itertools.product(pair_counts, step_sizes, level_counts))
+    seeds = np.random.SeedSequence(seed).spawn(len(designs))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(evaluate_design, d, n_sims, s, **observer) for d, s in zip(designs, seeds)]
+        results = [f.result() for f in futures]
+    return sorted(results, key=lambda r: (r["minutes"], r["ci95_width"]))
+
+
+def print_table(results):
+    print(f"{'pairs':>5} {'step':>5} {'levels':>6} {'trials':>6} {'min':>5} "
+          f"{'bias':>7} {'SD':>6} {'CI95':>6} {'fitCI':>6} {'fail':>4}")
+    for r in results:
+        print(f"{r['pair_count']:>5} {r['step_mm']:>5.2f} {r['levels']:>6} {r['trials']:>6} {r['minutes']:>5.1f} "
+              f"{r['bias']:>+7.3f} {r['sd']:>6.3f} {r['ci95_width']:>6.3f} {r['fit_ci95_width']:>6.3f} {r['failed']:>4}")
+
+
+if __name__ == "__main__":
+    # Per direction; the current design is pair_count 4, step 0.2 mm, 9 levels
+    print_table(evaluate_designs(pse=5.7, slope=4.0, lapse=0.02))
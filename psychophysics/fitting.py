@@ -0,0 +1,152 @@
+"""
+Maximum-likelihood fits of the logistic psychometric function.
+
+    P(test judged greater) = 1 / (1 + exp(-k (x - x0)))
+
+fitted to the binomial counts of count_mixed_logic_abs (n trials and r
+"greater" responses per level) instead of least squares on the rates, so
+levels weigh by their trial counts and 0 / 1 proportions are fine.
+
+Internally the model is a logistic regression, logit P = a + b (x - c),
+whose log-likelihood is concave: Newton's method with the analytic
+gradient and Hessian converges in a few steps from a = b = 0. Any number
+of conditions (stages × participants, bootstrap samples, ...) are solved
+together as one batch of 2 × 2 systems. Standard errors of x0 = c - a / b
+and k = b come from the inverse Hessian (delta method).
+"""
+import numpy as np
+
+
+MAX_LOGIT_SPAN = 40.0
+
+
+def logistic(x, x0, k):
+    """Standard logistic psychometric function (as in D_plot / H_plot)."""
+    return 1.0 / (1.0 + np.exp(-k * (x - x0)))
+
+
+def _expit(eta):
+    # logistic(eta) without overflow warnings at the large |eta| of steep or separated fits
+    return 0.5 * (1.0 + np.tanh(0.5 * eta))
+
+
+def _log_likelihood(eta, n, r):
+    # sum of r log p + (n - r) log(1 - p) with p = logistic(eta), stable for large |eta|
+    return np.sum(r * eta - n * np.logaddexp(0.0, eta), axis=-1)
+
+
+def fit_psychometric(x, n, greater, max_iter=50, tol=1e-9):
+    """
+    Fit one condition or a batch of conditions.
+    :param x: Levels (mm), shape (..., L); a leading batch shape fits many conditions at once
+    :param n: Trials per level, same shape; levels with n = 0 are ignored (use them as padding)
+    :param greater: "Greater" responses per level (may be fractional, e.g. bias-corrected rates × n)
+    :return: dict of arrays with the batch shape: x0, k, x0_se, k_se, loglik, iterations, converged.
+             converged is False where the data are (quasi-)separable, so the MLE slope is
+             infinite, or there are fewer than two levels with trials.
+    """
+    x, n, r = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, n, greater)))
+    batch = x.shape[:-1]
+    x, n, r = (v.reshape(-1, v.shape[-1]) for v in (x, n, r))
+
+    total = n.sum(axis=-1)
+    c = np.divide((n * x).sum(axis=-1), total, out=np.zeros(len(x)), where=total > 0)
+    d = x - c[:, None]  # centred levels keep the 2 × 2 systems well conditioned
+    theta = np.zeros((len(x), 2))
+    ll = _log_likelihood(np.zeros_like(d), n, r)
+    active = np.ones(len(x), dtype=bool)
+    iterations = np.zeros(len(x), dtype=int)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        eta = theta[:, :1] + theta[:, 1:] * d
+        p = _expit(eta)
+        resid = r - n * p
+        w = n * p * (1.0 - p)
+        g = np.stack([resid.sum(-1), (resid * d).sum(-1)], axis=-1)
+        h00, h01, h11 = w.sum(-1), (w * d).sum(-1), (w * d * d).sum(-1)  # minus the Hessian
+        det = h00 * h11 - h01 ** 2
+        ok = active & (det > 1e-12 * np.maximum(h00 * h11, 1e-300))
+        safe = np.where(ok, det, 1.0)
+        step = np.stack([(h11 * g[:, 0] - h01 * g[:, 1]) / safe,
+                         (h00 * g[:, 1] - h01 * g[:, 0]) / safe], axis=-1)
+        step[~ok] = 0.0
+        active &= ok
+
+        # Step halving: never accept a step that lowers the likelihood
+        t = np.ones(len(x))
+        for _ in range(30):
+            candidate = theta + t[:, None] * step
+            ll_new = _log_likelihood(candidate[:, :1] + candidate[:, 1:] * d, n, r)
+            worse = active & (ll_new < ll - 1e-12 * np.abs(ll))
+            if not worse.any():
+                break
+            t[worse] /= 2
+        theta = np.where(active[:, None], candidate, theta)
+        ll = np.where(active, ll_new, ll)
+        iterations += active
+        active &= np.abs(t[:, None] * step).max(axis=-1) > tol * (1 + np.abs(theta).max(axis=-1))
+
+    # Covariance of (a, b) = inverse of minus the Hessian at the optimum
+    eta = theta[:, :1] + theta[:, 1:] * d
+    p = _expit(eta)
+    w = n * p * (1.0 - p)
+    h00, h01, h11 = w.sum(-1), (w * d).sum(-1), (w * d * d).sum(-1)
+    det = h00 * h11 - h01 ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_a, var_b, cov_ab = h11 / det, h00 / det, -h01 / det
+        a, b = theta[:, 0], theta[:, 1]
+        x0 = c - a / b
+        # x0 = c - a / b: gradient (-1 / b, a / b²)
+        x0_var = var_a / b ** 2 - 2 * cov_ab * a / b ** 3 + var_b * a ** 2 / b ** 4
+
+    # A curve going from p ~ 0 to p ~ 1 (logit span > MAX_LOGIT_SPAN) across the tested levels is a
+    # separated data set running off to an infinite slope, not a psychometric function
+    tested = n > 0
+    span = np.where(tested, x, -np.inf).max(-1) - np.where(tested, x, np.inf).min(-1)
+    with np.errstate(invalid="ignore"):
+        converged = ~active & (det > 0) & (tested.sum(-1) >= 2) & (np.abs(b) * span < MAX_LOGIT_SPAN)
+    result = {
+        "x0": x0,
+        "k": b,
+        "x0_se": np.sqrt(x0_var),
+        "k_se": np.sqrt(var_b),
+        "loglik": ll,
+        "iterations": iterations,
+        "converged": converged,
+    }
+    return {key: value.reshape(batch) for key, value in result.items()}
+
+
+def stack_conditions(conditions):
+    """
+    (test_values, counts) results of count_mixed_logic_abs as zero-padded arrays.
+    :param conditions: list of (test_values, counts), or dict {key: (test_values, counts)}
+                       as count_mixed_logic_abs(..., by=...) returns
+    :return: keys (None for a list), and x, n, greater arrays of shape (conditions, levels)
+    """
+    keys = list(conditions) if isinstance(conditions, dict) else None
+    items = list(conditions.values()) if keys is not None else list(conditions)
+    width = max((len(test_values) for test_values, _ in items), default=1)
+    x, n, r = np.zeros((3, len(items), max(width, 1)))
+    for i, (test_values, counts) in enumerate(items):
+        x[i, :len(test_values)] = test_values
+        n[i, :len(test_values)] = counts[0]
+        r[i, :len(test_values)] = counts[1]
+    return keys, x, n, r
+
+
+def fit_conditions(conditions, **fit_args):
+    """
+    Fit many (test_values, counts) results of count_mixed_logic_abs in one batch.
+    :param conditions: list of (test_values, counts), or dict {key: (test_values, counts)}
+                       as count_mixed_logic_abs(..., by=...) returns
+    :return: list (or dict) of {"x0", "k", "x0_se", "k_se", "loglik", "iterations", "converged"} per condition
+    """
+    keys, x, n, r = stack_conditions(conditions)
+    if not len(x):
+        return {} if keys is not None else []
+    fits = fit_psychometric(x, n, r, **fit_args)
+    results = [{key: value[i].item() for key, value in fits.items()} for i in range(len(x))]
+    return dict(zip(keys, results)) if keys is not None else results
@@ -0,0 +1,55 @@
+import random
+
+
+class InterleavedTrials:
+    """
+    Several trial sequences (one per direction) run as one block.
+
+    Trials are drawn in rounds: every unfinished track appears once per round
+    in random order, and a round never starts with the track that ended the
+    previous one, so the same direction is not presented twice in a row while
+    another is left. Tracks can be adaptive sequences or plain trial lists.
+    After each yielded trial, current_track names the track it came from.
+    """
+
+    def __init__(self, tracks, seed=None):
+        """
+        :param tracks: {name: trial sequence}, e.g. {"forward": StaircaseTrials(...), ...}
+        :param seed: Seed for the track order
+        """
+        self.tracks = dict(tracks)
+        self.rng = random.Random(seed)
+        self.current_track = None
+
+    def __len__(self):
+        return sum(len(seq) for seq in self.tracks.values())
+
+    def __iter__(self):
+        iterators = {name: iter(seq) for name, seq in self.tracks.items()}
+        while iterators:
+            order = list(iterators)
+            self.rng.shuffle(order)
+            if len(order) > 1 and order[0] == self.current_track:
+                order[0], order[-1] = order[-1], order[0]
+            for name in order:
+                try:
+                    trial = next(iterators[name])
+                except StopIteration:
+                    del iterators[name]
+                    continue
+                self.current_track = name
+                yield trial
+
+    def record(self, response):
+        """
+        Feed the response to the track of the trial last yielded.
+        """
+        seq = self.tracks.get(self.current_track)
+        if hasattr(seq, "record"):
+            seq.record(response)
+
+    def estimate(self):
+        """
+        {name: PSE estimate in levels} for the adaptive tracks.
+        """
+        return {name: seq.estimate() for name, seq in self.tracks.items() if hasattr(seq, "estimate")}
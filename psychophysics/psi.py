@@ -0,0 +1,158 @@
+import random
+
+import numpy as np
+
+
+class PsiMethod:
+    """
+    Psi-method (Kontsevich & Tyler, QUEST+ style) selection of comparison levels.
+
+    The observer model is P(greater | x) = lapse / 2 + (1 - lapse) * logistic(k * (x - x0)),
+    with x the comparison level. A posterior over (x0, k, lapse) is kept on a
+    dense grid, and the likelihood of a "greater" response at every candidate
+    level is precomputed, so selection and update are a handful of array
+    operations over the grid. The next level is the one whose response is
+    expected to reduce the posterior entropy the most.
+    """
+
+    def __init__(self, levels, x0_grid=None, k_grid=None, lapse_grid=None, pse_only=False):
+        """
+        :param levels: Candidate comparison levels
+        :param x0_grid: PSE values of the grid (levels); 100 points over the level range ±2 if None
+        :param k_grid: Slopes per level; 100 log-spaced points in [0.1, 10] if None
+        :param lapse_grid: Lapse rates; 10 points in [0, 0.1] if None
+        :param pse_only: Minimise the entropy of the x0 marginal instead of the full posterior
+        """
+        self.levels = np.asarray(levels, dtype=float)
+        if x0_grid is None:
+            x0_grid = np.linspace(self.levels.min() - 2, self.levels.max() + 2, 100)
+        if k_grid is None:
+            k_grid = np.logspace(-1, 1, 100)
+        if lapse_grid is None:
+            lapse_grid = np.linspace(0.0, 0.1, 10)
+        self.x0_grid = np.asarray(x0_grid, dtype=float)
+        self.k_grid = np.asarray(k_grid, dtype=float)
+        self.lapse_grid = np.asarray(lapse_grid, dtype=float)
+        self.pse_only = pse_only
+
+        shape = (len(self.x0_grid), len(self.k_grid), len(self.lapse_grid))
+        self.posterior = np.full(shape, 1.0 / np.prod(shape))
+
+        # levels × x0 × k × lapse
+        x = self.levels[:, None, None, None]
+        x0 = self.x0_grid[None, :, None, None]
+        k = self.k_grid[None, None, :, None]
+        lapse = self.lapse_grid[None, None, None, :]
+        self.p_greater = lapse / 2 + (1 - lapse) / (1 + np.exp(-k * (x - x0)))
+
+        # Flattened tables for the entropy terms: sum(L·post·log(L·post)) splits into
+        # (L·log L) @ post + L @ (post·log post), so selection is a few matrix-vector products
+        self._L = self.p_greater.reshape(len(self.levels), -1)
+        self._L_log_L = _xlogx(self._L)
+        self._S_log_S = _xlogx(1 - self._L)
+
+        self.history = []  # [(level, greater)]
+
+    def select(self):
+        """
+        Index into levels of the most informative next comparison.
+        """
+        if self.pse_only:
+            joint = self.p_greater * self.posterior  # P(greater, θ | x)
+            p = joint.reshape(len(self.levels), -1).sum(axis=1)
+            plogp_g = _xlogx(joint.sum(axis=(2, 3))).sum(axis=1)
+            plogp_s = _xlogx((self.posterior - joint).sum(axis=(2, 3))).sum(axis=1)
+        else:
+            post = self.posterior.ravel()
+            post_log_post = _xlogx(post)
+            p = self._L @ post
+            L_plp = self._L @ post_log_post
+            plogp_g = self._L_log_L @ post + L_plp
+            plogp_s = self._S_log_S @ post + post_log_post.sum() - L_plp
+        # Expected entropy of the posterior after the response
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = (p * np.log(p) - plogp_g) + ((1 - p) * np.log(1 - p) - plogp_s)
+        return int(np.nanargmin(expected))
+
+    def update(self, level_index, greater):
+        """
+        Multiply in the likelihood of a response and renormalise.
+        """
+        likelihood = self.p_greater[level_index]
+        self.posterior *= likelihood if greater else 1 - likelihood
+        self.posterior /= self.posterior.sum()
+        self.history.append((self.levels[level_index], greater))
+
+    def estimate(self):
+        """
+        Posterior means and the posterior SD of x0.
+        :return: {"x0", "x0_sd", "k", "lapse"}
+        """
+        px0 = self.posterior.sum(axis=(1, 2))
+        x0 = float(px0 @ self.x0_grid)
+        return {
+            "x0": x0,
+            "x0_sd": float(np.sqrt(px0 @ (self.x0_grid - x0) ** 2)),
+            "k": float(self.posterior.sum(axis=(0, 2)) @ self.k_grid),
+            "lapse": float(self.posterior.sum(axis=(0, 1)) @ self.lapse_grid),
+        }
+
+
+def _xlogx(a):
+    """
+    Elementwise a·log a with 0·log 0 = 0.
+    """
+    return a * np.log(np.where(a > 0, a, 1.0))
+
+
+class PsiTrials:
+    """
+    Lazily generated trial sequence driven by a PsiMethod; the same interface
+    as staircase.StaircaseTrials (iterate, record(response), estimate()).
+    """
+
+    def __init__(self, make_trial, levels, max_trials=30, seed=None, **psi_args):
+        """
+        :param make_trial: make_trial(level, std_idx) -> trial in the format the UI plays
+        :param levels: Candidate comparison levels
+        :param max_trials: Number of trials in the sequence
+        :param seed: Seed for the presentation order
+        :param psi_args: Passed on to PsiMethod
+        """
+        self.make_trial = make_trial
+        self.max_trials = max_trials
+        self.psi = PsiMethod(levels, **psi_args)
+        self.rng = random.Random(seed)
+        self._pending = None  # (level index, std_idx) of the trial awaiting a response
+        self._orders = []
+
+    def __len__(self):
+        return self.max_trials
+
+    def __iter__(self):
+        for _ in range(self.max_trials):
+            index = self.psi.select()
+            if not self._orders:
+                # Standard first / comparison first, balanced in pairs
+                self._orders = [1, 2]
+                self.rng.shuffle(self._orders)
+            std_idx = self._orders.pop()
+            self._pending = (index, std_idx)
+            yield self.make_trial(int(self.psi.levels[index]), std_idx)
+
+    def record(self, response):
+        """
+        Feed the response to the trial last yielded ("First Greater" / "Second Greater").
+        """
+        if self._pending is None:
+            return
+        index, std_idx = self._pending
+        self._pending = None
+        # The comparison is second when the standard is first (std_idx 1)
+        self.psi.update(index, (response == "Second Greater") == (std_idx == 1))
+
+    def estimate(self):
+        """
+        PSE estimate in levels (posterior mean of x0).
+        """
+        return self.psi.estimate()["x0"]
@@ -0,0 +1,233 @@
+"""
+Typed, columnar trial files written next to the text result reports.
+
+One row per trial with every field the UI recorded, the raw stimulus
+positions and the signed mm labels of the report. Parquet when pyarrow is
+installed, otherwise CSV with a JSON schema beside it
+(Kevin_..._trials.csv + Kevin_..._trials.schema.json). load_trials reads
+either straight into a typed DataFrame, no regex involved. load_report
+reads the text reports of sessions recorded before the trial files.
+
+Writing needs only the standard library, so the experiment PCs do not
+need pandas; reading needs pandas.
+"""
+import csv
+import io
+import json
+import os
+import re
+
+SCHEMA_VERSION = 1
+
+# (column, type); missing fields are written empty and read back as NA
+COLUMNS = [
+    ("trial", "int"),
+    ("stage", "str"),            # direction of the trial
+    ("block", "str"),            # stage of the session it ran in (interleaved for a mixed block)
+    ("pos1", "int"),             # raw stimulus positions, first element of [pos, 0]
+    ("pos2", "int"),
+    ("mm1", "float"),            # signed labels as in the text report
+    ("mm2", "float"),
+    ("std_idx", "int"),          # empty for Horizontal sessions
+    ("response", "str"),
+    ("rt", "float"),
+    ("t_start", "float"),
+    ("t_end", "float"),
+    ("stim1_onset", "float"),
+    ("stim1_offset", "float"),
+    ("stim2_onset", "float"),
+    ("stim2_offset", "float"),
+    ("response_time", "float"),
+    ("response_source", "str"),
+    ("input_latency", "float"),
+    ("index", "int"),            # position in the session plan
+]
+
+# Column types when read with pandas
+PANDAS_TYPES = {"int": "Int64", "float": "float64", "str": "category"}
+# read_csv is several times faster on float64 than on nullable Int64, so ints are converted after parsing
+PARSE_TYPES = {"int": "float64", "float": "float64", "str": "category"}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cell(value, kind):
+    if isinstance(value, (list, tuple)):
+        value = value[0]  # [pos, 0] stimulus
+    if value is None or (kind == "float" and value != value):
+        return None
+    return {"int": int, "float": float, "str": str}[kind](value)
+
+
+def write_trials(rows, filename, fmt=None):
+    """
+    Write trial records as a columnar file.
+    :param rows: Trial dicts (the UI's responses plus mm1 / mm2); unknown keys are ignored
+    :param filename: Path without extension, e.g. Results/Kevin_20250101_120000_30.0min_trials
+    :param fmt: "parquet" or "csv"; parquet if pyarrow is installed when None
+    :return: Path written
+    """
+    if fmt is None:
+        fmt = "parquet" if parquet_available() else "csv"
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    columns = {name: [_cell(row.get(name), kind) for row in rows] for name, kind in COLUMNS}
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+        schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS],
+                           metadata={"schema_version": str(SCHEMA_VERSION)})
+        path = filename + ".parquet"
+        pq.write_table(pa.table(columns, schema=schema), path)
+    elif fmt == "csv":
+        path = filename + ".csv"
+        with open(filename + ".schema.json", "w", encoding="utf-8") as f:
+            json.dump({"version": SCHEMA_VERSION, "columns": [{"name": n, "type": k} for n, k in COLUMNS]}, f,
+                      indent=1)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in COLUMNS])
+            writer.writerows(zip(*(["" if v is None else v for v in columns[name]] for name, _ in COLUMNS)))
+    else:
+        raise ValueError("Format must be 'parquet' or 'csv'")
+    print(f"Trials saved to {path}")
+    return path
+
+
+def _read_csv(source, columns):
+    import pandas as pd
+
+    df = pd.read_csv(source, dtype={name: PARSE_TYPES[kind] for name, kind in columns})
+    for name, kind in columns:
+        if kind == "int" and name in df:
+            df[name] = df[name].astype("Int64")
+    return df
+
+
+# "Trial 2: 4.9mm vs 5.5mm  2  Second Greater  RT 0.532s"; std_idx only in Depth/Combined reports
+REPORT_LINE = re.compile(
+    r"Trial\s+(\d+):\s+(-?[\d\s]+\.\d+)mm\s+vs\s+(-?[\d\s]+\.\d+)mm\s+(?:([12])\s+)?"
+    r"(First Greater|Second Greater)(?:\s+RT\s+([\d.]+)s)?"
+)
+REPORT_SECTION = re.compile(r"===\s+(Forward|Backward|Left|Right)\s+Trials\s+===")
+
+
+def load_report(filename, absolute=True):
+    """
+    Read a text result report (any of the three experiments) into the
+    columns of load_trials that the report holds: stage, trial, mm1, mm2,
+    std_idx, resp_str and rt. The stage comes from the section header.
+    """
+    import pandas as pd
+
+    rows = []
+    stage = None
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("==="):
+                section = REPORT_SECTION.match(line)
+                stage = section.group(1).lower() if section else None
+                continue
+            m = REPORT_LINE.match(line)
+            if not m or stage is None:
+                continue
+            trial, mm1, mm2, std_idx, response, rt = m.groups()
+            rows.append((stage, int(trial), float(mm1.replace(" ", "")), float(mm2.replace(" ", "")),
+                         int(std_idx) if std_idx else None, response, float(rt) if rt else float("nan")))
+    df = pd.DataFrame(rows, columns=["stage", "trial", "mm1", "mm2", "std_idx", "response", "rt"])
+    df = df.astype({"stage": "category", "trial": "Int64", "std_idx": "Int64", "response": "category"})
+    return _finish(df, absolute)
+
+
+def _finish(df, absolute):
+    df = df.rename(columns={"response": "resp_str"})
+    if absolute:
+        df["mm1"] = df["mm1"].abs()
+        df["mm2"] = df["mm2"].abs()
+    return df
+
+
+def _schema(filename):
+    schema_file = filename[:-len(".csv")] + ".schema.json"
+    if not os.path.exists(schema_file):
+        return COLUMNS
+    with open(schema_file, encoding="utf-8") as f:
+        return [(c["name"], c["type"]) for c in json.load(f)["columns"]]
+
+
+def session_name(filename):
+    """
+    Kevin_20250101_120000_30.0min_trials.csv -> Kevin_20250101_120000_30.0min, the name of the text report.
+    """
+    name = os.path.splitext(os.path.basename(filename))[0]
+    return name[:-len("_trials")] if name.endswith("_trials") else name
+
+
+def load_trials(filename, absolute=True):
+    """
+    Read a file from write_trials into a typed DataFrame.
+    The response column is named resp_str and, with absolute, mm1 / mm2 are
+    absolute values, as in the plot scripts' load_and_parse_abs, so the frame
+    goes straight into count_mixed_logic_abs.
+    """
+    import pandas as pd
+
+    if filename.endswith(".parquet"):
+        df = pd.read_parquet(filename)
+        for name, kind in COLUMNS:
+            if name in df:
+                df[name] = df[name].astype(PANDAS_TYPES[kind])
+    else:
+        df = _read_csv(filename, _schema(filename))
+    return _finish(df, absolute)
+
+
+def load_trial_files(filenames, absolute=True):
+    """
+    Many trial files as one DataFrame with participant and session columns
+    (as psychophysics.analysis.load_sessions gives for text reports).
+
+    CSV files with the current header are joined as text and parsed in a
+    single read_csv call, so the cost per file is little more than reading
+    it; Parquet files and older schemas are read one by one after them.
+    """
+    import numpy as np
+    import pandas as pd
+
+    header = ",".join(name for name, _ in COLUMNS)
+    bodies, joined, separate, frames = [], [], [], []  # (session, rows) of joined / separately read files
+    for filename in filenames:
+        if filename.endswith(".csv"):
+            with open(filename, encoding="utf-8", newline="") as f:
+                first, _, body = f.read().partition("\n")
+            if first.rstrip("\r") == header:
+                bodies.append(body)
+                joined.append((session_name(filename), body.count("\n")))
+                continue
+        frames.append(load_trials(filename, absolute=False))
+        separate.append((session_name(filename), len(frames[-1])))
+
+    if bodies:
+        frames.insert(0, _read_csv(io.StringIO(header + "\n" + "".join(bodies)), COLUMNS))
+    if not frames:
+        return pd.DataFrame(columns=["participant", "session"] + [name for name, _ in COLUMNS])
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    # Categorical codes per file, repeated over its rows
+    files = joined + separate
+    session_names = sorted({session for session, _ in files})
+    participant_names = sorted({session.split("_")[0] for session in session_names})
+    session_codes = np.array([session_names.index(session) for session, _ in files])
+    participant_codes = np.array([participant_names.index(session.split("_")[0]) for session, _ in files])
+    counts = [rows for _, rows in files]
+    df.insert(0, "participant", pd.Categorical.from_codes(np.repeat(participant_codes, counts), participant_names))
+    df.insert(1, "session", pd.Categorical.from_codes(np.repeat(session_codes, counts), session_names))
+    return _finish(df, absolute)
@@ -0,0 +1,146 @@
+import random
+
+
+class Staircase:
+    """
+    One adaptive up-down track over comparison levels (integer steps).
+
+    A "greater" response (comparison judged greater than the standard) moves
+    the level down, a "smaller" response moves it up. Two rules are supported
+    and can be combined:
+
+    - transformed (Levitt): step down only after n_down consecutive "greater"
+      responses and up after n_up consecutive "smaller" ones;
+    - weighted (Kaernbach): step_up / step_down = target / (1 - target), which
+      converges on P(greater) = target with n_down = n_up = 1.
+
+    The default (target 0.5, 1-up/1-down) converges on the PSE.
+    """
+
+    def __init__(self, start_level, step=1, initial_step=None, target=0.5, n_down=1, n_up=1,
+                 min_level=-8, max_level=8):
+        """
+        :param start_level: First comparison level
+        :param step: Step size in levels (STEP_SIZE_MM units), used after the first reversal
+        :param initial_step: Larger step used until the first reversal (step if None)
+        :param target: P(greater) the weighted rule converges on
+        :param n_down: Consecutive "greater" responses needed to step down
+        :param n_up: Consecutive "smaller" responses needed to step up
+        :param min_level: Lowest level presented
+        :param max_level: Highest level presented
+        """
+        self.level = start_level
+        self.step = step
+        self.initial_step = initial_step if initial_step is not None else step
+        self.weight_up = target / (1 - target) if target >= 0.5 else 1.0
+        self.weight_down = 1.0 if target >= 0.5 else (1 - target) / target
+        self.n_down = n_down
+        self.n_up = n_up
+        self.min_level = min_level
+        self.max_level = max_level
+
+        self.history = []     # [(level, greater)]
+        self.reversals = []   # levels at which the direction changed
+        self._run = 0         # consecutive responses in the current direction, signed
+        self._direction = 0   # +1 last step was up, -1 down, 0 none yet
+
+    @property
+    def current_level(self):
+        """
+        Level to present next, rounded to a whole step.
+        """
+        return int(round(self.level))
+
+    def update(self, greater):
+        """
+        Record a response at the current level and move to the next level.
+        """
+        self.history.append((self.current_level, greater))
+        if greater:
+            self._run = self._run + 1 if self._run > 0 else 1
+            if self._run < self.n_down:
+                return
+            direction = -1
+            size = self.weight_down
+        else:
+            self._run = self._run - 1 if self._run < 0 else -1
+            if -self._run < self.n_up:
+                return
+            direction = 1
+            size = self.weight_up
+        self._run = 0
+
+        if self._direction and direction != self._direction:
+            self.reversals.append(self.level)
+        self._direction = direction
+        step = self.step if self.reversals else self.initial_step
+        self.level = min(max(self.level + direction * size * step, self.min_level), self.max_level)
+
+    def estimate(self, discard=2):
+        """
+        Mean level of the reversals after the first discard ones (None if there are none).
+        """
+        usable = self.reversals[discard:]
+        if not usable:
+            return None
+        return sum(usable) / len(usable)
+
+
+class StaircaseTrials:
+    """
+    Lazily generated trial sequence driven by interleaved staircases.
+
+    Iterating yields one trial at a time, built from the level of a randomly
+    chosen track; call record(response) after each trial so the next one
+    uses it. len() is the number of trials, so ExperimentUI can use it in
+    place of a get_trial_moves list.
+    """
+
+    def __init__(self, make_trial, max_trials=30, start_levels=(4, -4), seed=None, **staircase_args):
+        """
+        :param make_trial: make_trial(level, std_idx) -> trial in the format the UI plays
+        :param max_trials: Number of trials in the sequence
+        :param start_levels: Start level of each interleaved track
+        :param seed: Seed for track choice and presentation order
+        :param staircase_args: Passed on to every Staircase
+        """
+        self.make_trial = make_trial
+        self.max_trials = max_trials
+        self.tracks = [Staircase(level, **staircase_args) for level in start_levels]
+        self.rng = random.Random(seed)
+        self._pending = None  # (track, std_idx) of the trial awaiting a response
+        self._orders = []
+
+    def __len__(self):
+        return self.max_trials
+
+    def __iter__(self):
+        for _ in range(self.max_trials):
+            track = self.rng.choice(self.tracks)
+            if not self._orders:
+                # Standard first / comparison first, balanced in pairs
+                self._orders = [1, 2]
+                self.rng.shuffle(self._orders)
+            std_idx = self._orders.pop()
+            self._pending = (track, std_idx)
+            yield self.make_trial(track.current_level, std_idx)
+
+    def record(self, response):
+        """
+        Feed the response to the trial last yielded ("First Greater" / "Second Greater").
+        """
+        if self._pending is None:
+            return
+        track, std_idx = self._pending
+        self._pending = None
+        # The comparison is second when the standard is first (std_idx 1)
+        track.update((response == "Second Greater") == (std_idx == 1))
+
+    def estimate(self, discard=2):
+        """
+        PSE estimate in levels: mean of the track estimates (None before any usable reversal).
+        """
+        estimates = [e for e in (t.estimate(discard) for t in self.tracks) if e is not None]
+        if not estimates:
+            return None
+        return sum(estimates) / len(estimates)
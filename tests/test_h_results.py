@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pandas")
+os.environ.setdefault("DXL_BACKEND", "sim")  # H_main imports the controller
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "PSE_Experiment", "Horizontal")))
+from H_main import generate_result_file
+from H_params import get_trial_moves
+from psychophysics.results import load_report, load_trials
+
+
+def responses():
+    # As H_experiment_ui records them: the "left" stage plays the positive (right) moves
+    records = []
+    for stage, direction in (("left", "right"), ("right", "left")):
+        for i, (pos1, pos2) in enumerate(get_trial_moves(2, direction)[:6], start=1):
+            records.append({"trial": i, "stage": stage, "value": [pos1, pos2],
+                            "response": "First Greater" if i % 2 else "Second Greater", "rt": 0.5})
+    return records
+
+
+def test_trial_file_and_report_agree_on_stages(tmp_path):
+    filename = str(tmp_path / "Results" / "P01_H.txt")
+    generate_result_file(responses(), filename)
+
+    report = load_report(filename)
+    trials = load_trials(str(tmp_path / "Results" / "P01_H_trials.csv"))
+
+    def key(df):
+        return sorted(zip(df["stage"].astype(str), df["trial"].astype(int), df["mm1"], df["mm2"]))
+
+    assert len(report) == len(trials) == 12
+    assert key(trials) == key(report)
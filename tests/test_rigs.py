@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("DXL_BACKEND", "sim")  # MotorConfig without the serial SDK
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "PSE_Experiment", "Combined")))
+from rigs import Rig
+
+
+def test_parse_without_offsets_uses_default_calibration():
+    rig = Rig.parse("COM4=P02", 2)
+    assert (rig.name, rig.port, rig.participant, rig.mid_offsets, rig.resume) == ("rig2", "COM4", "P02", None, None)
+
+
+def test_parse_offsets_and_journal():
+    rig = Rig.parse("COM4@1010,975=P02=Results/P02_journal.jsonl", 1)
+    assert rig.port == "COM4"
+    assert rig.participant == "P02"
+    assert rig.mid_offsets == (1010, 975)
+    assert rig.resume == "Results/P02_journal.jsonl"
+
+
+def test_offsets_reach_motor_configs():
+    from dxl_control.controller import MOTOR_H, MOTOR_D
+
+    horizontal, depth = Rig.parse("COM4@1010,975=P02", 1).motors()
+    assert (horizontal.dxl_id, horizontal.mid_offset) == (MOTOR_H.dxl_id, 1010)
+    assert (depth.dxl_id, depth.mid_offset) == (MOTOR_D.dxl_id, 975)
+
+
+@pytest.mark.parametrize("text", ["COM4", "COM4@1010=P02", "COM4@a,b=P02"])
+def test_parse_rejects_bad_specs(text):
+    with pytest.raises(ValueError):
+        Rig.parse(text, 1)